@@ -9,16 +9,21 @@ Data: 2025-06-20
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
 import sqlite3
 import os
 import time
 from contextlib import contextmanager
 from typing import Optional, List, Dict, Any
 import threading
-import random
+import atexit
+from collections import deque
+
+try:
+    from numba import njit
+except ImportError:  # numba é opcional; sem ele usamos a versão NumPy
+    njit = None
 
 # Configuração da página
 st.set_page_config(
@@ -28,8 +33,8 @@ st.set_page_config(
     page_icon="🌱"
 )
 
-# CSS customizado
-st.markdown("""
+# HTML/CSS estático da página (cabeçalho e rodapé são definidos junto)
+_CUSTOM_CSS = """
     <style>
     .main-header {
         background: linear-gradient(135deg, #4CAF50, #45a049);
@@ -68,7 +73,26 @@ st.markdown("""
         border-radius: 4px;
     }
     </style>
-""", unsafe_allow_html=True)
+"""
+
+_HEADER_HTML = """
+    <div class="main-header">
+        <h1>🌱 FarmTech ERP</h1>
+        <p>Sistema Unificado de Gerenciamento de Irrigação Inteligente</p>
+    </div>
+"""
+
+_FOOTER_HTML = """
+    <div style="text-align: center; color: #666; padding: 1rem;">
+        <small>
+            🌱 FarmTech ERP v2.0 Simplificado | Desenvolvido por Diogo Zequini + Claude AI | 
+            © 2025 | Sistema Único de Irrigação Inteligente
+        </small>
+    </div>
+"""
+
+# CSS customizado
+st.markdown(_CUSTOM_CSS, unsafe_allow_html=True)
 
 # Configurações do banco de dados
 DB_PATH = "farmtech_data.db"
@@ -84,15 +108,143 @@ CONFIG = {
     'PH_CRITICO_MAXIMO': 7.5,
 }
 
+# Limiares lidos uma única vez do CONFIG para as decisões de irrigação
+(_UMID_CRIT, _UMID_MIN, _UMID_HI, _PH_LO, _PH_HI, _PH_CRIT_LO, _PH_CRIT_HI) = (
+    float(CONFIG['UMIDADE_CRITICA_BAIXA']),
+    float(CONFIG['UMIDADE_MINIMA_PARA_IRRIGAR']),
+    float(CONFIG['UMIDADE_ALTA_PARAR_IRRIGACAO']),
+    float(CONFIG['PH_IDEAL_MINIMO']),
+    float(CONFIG['PH_IDEAL_MAXIMO']),
+    float(CONFIG['PH_CRITICO_MINIMO']),
+    float(CONFIG['PH_CRITICO_MAXIMO']),
+)
+
+# Comandos SQL fixos: o texto idêntico reaproveita o statement já preparado
+# no cache da conexão (sem novo parse/plan a cada chamada)
+_INSERT_SQL = """
+    INSERT INTO leituras_sensores 
+    (timestamp, umidade, ph_estimado, fosforo_presente, potassio_presente, 
+     temperatura, bomba_ligada, emergencia, decisao_logica_esp32)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+# RETURNING (SQLite 3.35+) devolve o id no mesmo statement do INSERT
+_INSERT_RETURNING_SQL = _INSERT_SQL.rstrip() + "\n    RETURNING id\n"
+_LATEST_SQL = """
+    SELECT * FROM leituras_sensores 
+    ORDER BY timestamp DESC 
+    LIMIT 1
+"""
+_DELETE_SQL = "DELETE FROM leituras_sensores WHERE id = ?"
+# Colunas que update_leitura aceita (a tela de edição usa a mesma lista)
+_CAMPOS_ATUALIZAVEIS = ("umidade", "ph_estimado", "temperatura", "fosforo_presente",
+                        "potassio_presente", "bomba_ligada", "emergencia")
+_UPDATE_SQL = {col: f"UPDATE leituras_sensores SET {col} = ? WHERE id = ?" for col in _CAMPOS_ATUALIZAVEIS}
+
+# Pool de conexões: uma conexão SQLite de longa duração por thread
+_tls = threading.local()
+_pool_lock = threading.Lock()
+_pooled_connections: List[sqlite3.Connection] = []
+
+def _open_pooled_connection() -> sqlite3.Connection:
+    """Abre uma conexão persistente e aplica os PRAGMAs uma única vez"""
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None,
+                           cached_statements=256)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-20000")
+    conn.execute("PRAGMA mmap_size=134217728")
+    with _pool_lock:
+        _pooled_connections.append(conn)
+    return conn
+
+@atexit.register
+def _close_pooled_connections():
+    """Fecha todas as conexões do pool ao encerrar o processo"""
+    with _pool_lock:
+        while _pooled_connections:
+            try:
+                _pooled_connections.pop().close()
+            except sqlite3.Error:
+                pass
+
 # Funções do banco de dados
 @contextmanager
 def get_db_connection():
-    """Context manager para conexão com banco de dados"""
-    conn = sqlite3.connect(DB_PATH)
-    try:
-        yield conn
-    finally:
-        conn.close()
+    """Context manager que entrega a conexão da thread atual (sem fechá-la)"""
+    conn = getattr(_tls, "conn", None)
+    if conn is None:
+        conn = _tls.conn = _open_pooled_connection()
+    yield conn
+
+def _db_version() -> int:
+    """Versão dos dados nesta sessão; usada como chave dos caches de leitura"""
+    return st.session_state.get("db_version", 0)
+
+def _invalidate_read_cache():
+    """Força as próximas leituras a consultarem o banco novamente"""
+    st.session_state["db_version"] = _db_version() + 1
+
+# Timestamps gravados como segundos Unix (INTEGER): a leitura vira um cast
+# vetorizado int -> datetime64, sem inferência de formato sobre texto
+# Horário "local" da fazenda: zona IANA, para acompanhar mudanças de horário de verão
+_FUSO_LOCAL = ZoneInfo("America/Sao_Paulo")
+
+def _agora_local() -> datetime:
+    """Horário atual da fazenda, sem fuso (mesma convenção das datas exibidas)"""
+    return datetime.now(_FUSO_LOCAL).replace(tzinfo=None)
+
+def _para_epoch(ts) -> int:
+    """Converte um datetime (ingênuo = horário de _FUSO_LOCAL) em segundos Unix"""
+    if not isinstance(ts, datetime):
+        return int(ts)
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=_FUSO_LOCAL)
+    return int(ts.timestamp())
+
+def _de_epoch(segundos: int) -> datetime:
+    """Segundos Unix -> horário de _FUSO_LOCAL, sem fuso"""
+    return datetime.fromtimestamp(segundos, _FUSO_LOCAL).replace(tzinfo=None)
+
+def _para_horario_local(df: pd.DataFrame) -> pd.DataFrame:
+    """Passa o índice UTC vindo do banco para o horário local, sem fuso"""
+    if not df.empty:
+        df.index = df.index.tz_convert(_FUSO_LOCAL).tz_localize(None)
+    return df
+
+_PARSE_TIMESTAMP = {"timestamp": {"unit": "s", "utc": True}}
+
+_VERSAO_ESQUEMA = 1
+
+def _migrar_timestamps_texto(conn) -> int:
+    """Reescreve timestamps em texto (horário de _FUSO_LOCAL) como segundos Unix
+
+    Nenhuma linha pode ficar como TEXT: o SQLite ordena TEXT acima de qualquer
+    INTEGER, e ela passaria a ser a "última leitura". Textos que não são data ISO
+    nem número vão para leituras_sensores_quarentena. Retorna quantas foram para lá.
+    """
+    convertidos, ilegiveis = [], []
+    for leitura_id, texto in conn.execute(
+            "SELECT id, timestamp FROM leituras_sensores WHERE typeof(timestamp) = 'text'"):
+        try:
+            convertidos.append((_para_epoch(datetime.fromisoformat(texto.strip())), leitura_id))
+        except ValueError:
+            try:
+                convertidos.append((int(float(texto)), leitura_id))  # Segundos Unix gravados como texto
+            except (ValueError, OverflowError):
+                ilegiveis.append((leitura_id,))
+    conn.executemany("UPDATE leituras_sensores SET timestamp = ? WHERE id = ?", convertidos)
+    if ilegiveis:
+        conn.execute("CREATE TABLE IF NOT EXISTS leituras_sensores_quarentena AS "
+                     "SELECT * FROM leituras_sensores WHERE 0")
+        conn.executemany("INSERT INTO leituras_sensores_quarentena "
+                         "SELECT * FROM leituras_sensores WHERE id = ?", ilegiveis)
+        conn.executemany("DELETE FROM leituras_sensores WHERE id = ?", ilegiveis)
+    restantes = conn.execute(
+        "SELECT COUNT(*) FROM leituras_sensores WHERE typeof(timestamp) = 'text'").fetchone()[0]
+    if restantes:
+        raise RuntimeError(f"{restantes} timestamps em texto não migrados")
+    return len(ilegiveis)
 
 def init_database():
     """Inicializa o banco de dados"""
@@ -101,7 +253,7 @@ def init_database():
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS leituras_sensores (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    timestamp INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
                     umidade REAL NOT NULL,
                     ph_estimado REAL NOT NULL,
                     fosforo_presente BOOLEAN NOT NULL,
@@ -112,78 +264,251 @@ def init_database():
                     emergencia BOOLEAN NOT NULL DEFAULT 0
                 )
             """)
-            conn.commit()
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_leituras_timestamp
+                ON leituras_sensores(timestamp DESC)
+            """)
+            # Migração única (versão do esquema em user_version): leituras antigas
+            # guardavam o horário local como texto
+            if conn.execute("PRAGMA user_version").fetchone()[0] < _VERSAO_ESQUEMA:
+                conn.execute("BEGIN")
+                try:
+                    em_quarentena = _migrar_timestamps_texto(conn)
+                    # Só marca a versão depois que nenhuma linha TEXT restou
+                    conn.execute(f"PRAGMA user_version = {_VERSAO_ESQUEMA}")
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+                if em_quarentena:
+                    st.warning(f"{em_quarentena} leituras com timestamp ilegível foram movidas "
+                               "para a tabela leituras_sensores_quarentena.")
+            conn.execute("PRAGMA journal_mode=WAL")
         return True
     except Exception as e:
         st.error(f"Erro ao inicializar banco: {e}")
         return False
 
+# Últimas leituras da sessão, em memória: o Painel monta a tendência daqui
+# sem voltar ao banco a cada escrita
+_RECENTES_MAX = 1024
+_CAMPOS_INSERT = ("timestamp", "umidade", "ph_estimado", "fosforo_presente", "potassio_presente",
+                  "temperatura", "bomba_ligada", "emergencia", "decisao_logica_esp32")
+
+def _registrar_recentes(linhas, primeiro_id):
+    """Acrescenta as linhas recém-gravadas (tuplas na ordem de _CAMPOS_INSERT) ao deque"""
+    recentes = st.session_state.get("recent_rows")
+    if recentes is None:
+        return
+    for leitura_id, valores in enumerate(linhas, start=primeiro_id):
+        linha = dict(zip(_CAMPOS_INSERT[:-1], valores))
+        linha["timestamp"] = _de_epoch(_para_epoch(linha["timestamp"]))
+        linha["id"] = leitura_id
+        recentes.append(linha)
+
+def _descartar_recentes():
+    """Esvazia a memória da sessão; a próxima leitura do Painel recarrega do banco"""
+    st.session_state.pop("recent_rows", None)
+
 def add_leitura(timestamp, umidade, ph_estimado, fosforo_presente, potassio_presente, 
                temperatura, bomba_ligada, emergencia, decisao_logica_esp32="Manual"):
     """Adiciona uma nova leitura ao banco"""
     try:
         with get_db_connection() as conn:
-            conn.execute("""
-                INSERT INTO leituras_sensores 
-                (timestamp, umidade, ph_estimado, fosforo_presente, potassio_presente, 
-                 temperatura, bomba_ligada, emergencia, decisao_logica_esp32)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (timestamp, umidade, ph_estimado, fosforo_presente, potassio_presente,
-                  temperatura, bomba_ligada, emergencia, decisao_logica_esp32))
-            conn.commit()
-            return conn.lastrowid
+            cursor = conn.execute(_INSERT_RETURNING_SQL, (_para_epoch(timestamp), umidade, ph_estimado, fosforo_presente,
+                  potassio_presente, temperatura, bomba_ligada, emergencia, decisao_logica_esp32))
+            leitura_id = cursor.fetchone()[0]
+        _invalidate_read_cache()
+        _registrar_recentes([(timestamp, umidade, ph_estimado, fosforo_presente, potassio_presente,
+                              temperatura, bomba_ligada, emergencia)], leitura_id)
+        return leitura_id
     except Exception as e:
         st.error(f"Erro ao adicionar leitura: {e}")
         return None
 
+# Colunas lidas pelas páginas (decisao_logica_esp32 não é exibida)
+_COLUNAS_LEITURA = """timestamp, umidade, ph_estimado, temperatura, bomba_ligada,
+                   emergencia, fosforo_presente, potassio_presente, id"""
+
+@st.cache_data(ttl=5, show_spinner=False)
+def _get_leituras_cached(limit, version):
+    """Consulta as leituras; *version* apenas diferencia as entradas do cache"""
+    with get_db_connection() as conn:
+        df = pd.read_sql_query(f"""
+            SELECT {_COLUNAS_LEITURA}
+            FROM leituras_sensores 
+            ORDER BY timestamp DESC 
+            LIMIT ?
+        """, conn, params=(limit,), parse_dates=_PARSE_TIMESTAMP, index_col="timestamp")
+    
+    if not df.empty:
+        # A consulta já vem ordenada (DESC); basta inverter para ordem cronológica
+        return _para_horario_local(df.iloc[::-1])
+    return pd.DataFrame()
+
+def add_leituras_bulk(rows: List[tuple]):
+    """Adiciona várias leituras em uma única transação.
+
+    Cada tupla segue a ordem (timestamp em segundos Unix, umidade, ph_estimado, fosforo_presente,
+    potassio_presente, temperatura, bomba_ligada, emergencia, decisao_logica_esp32).
+    """
+    if not rows:
+        return 0
+    try:
+        with get_db_connection() as conn:
+            conn.execute("BEGIN")
+            try:
+                conn.executemany(_INSERT_SQL, rows)
+                # Dentro da transação os ids AUTOINCREMENT saem consecutivos
+                ultimo_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        _invalidate_read_cache()
+        _registrar_recentes(rows, ultimo_id - len(rows) + 1)
+        return len(rows)
+    except Exception as e:
+        st.error(f"Erro ao adicionar leituras: {e}")
+        return 0
+
 def get_leituras(limit=100):
     """Obtém leituras do banco de dados"""
     try:
-        with get_db_connection() as conn:
-            df = pd.read_sql_query("""
-                SELECT * FROM leituras_sensores 
-                ORDER BY timestamp DESC 
-                LIMIT ?
-            """, conn, params=(limit,))
-            
-            if not df.empty:
-                df['timestamp'] = pd.to_datetime(df['timestamp'])
-                df.set_index('timestamp', inplace=True)
-                return df.sort_index()
-            return pd.DataFrame()
+        return _get_leituras_cached(limit, _db_version())
     except Exception as e:
         st.error(f"Erro ao carregar dados: {e}")
         return pd.DataFrame()
 
+def get_tendencia_recente(n: int, ultima_leitura: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+    """Últimas *n* leituras (ordem cronológica), servidas da memória da sessão.
+
+    O banco só é consultado na primeira vez ou quando *ultima_leitura* (gravada
+    por outra sessão, por exemplo) ainda não está na memória.
+    """
+    recentes = st.session_state.get("recent_rows")
+    if recentes is None or (ultima_leitura and not any(r["id"] == ultima_leitura["id"] for r in recentes)):
+        df = get_leituras(limit=_RECENTES_MAX)
+        recentes = deque(df.reset_index().to_dict("records") if not df.empty else (),
+                         maxlen=_RECENTES_MAX)
+        st.session_state["recent_rows"] = recentes
+    if not recentes:
+        return pd.DataFrame()
+    return pd.DataFrame(recentes).set_index("timestamp").sort_index().tail(n)
+
+def _limites_periodo(data_inicio, data_fim):
+    """Converte datas (inclusive) nos limites [início, fim), em segundos Unix, usados no WHERE"""
+    inicio = datetime.combine(data_inicio, datetime.min.time())
+    fim = datetime.combine(data_fim + timedelta(days=1), datetime.min.time())
+    return _para_epoch(inicio), _para_epoch(fim)
+
+@st.cache_data(ttl=5, show_spinner=False)
+def _get_leituras_periodo_cached(data_inicio, data_fim, amostra, version):
+    """Consulta as leituras entre duas datas (inclusive), em ordem cronológica.
+
+    Com *amostra*, devolve no máximo esse número de linhas sorteadas no SQL.
+    """
+    params = _limites_periodo(data_inicio, data_fim)
+    sql = f"""
+        SELECT {_COLUNAS_LEITURA}
+        FROM leituras_sensores 
+        WHERE timestamp >= ? AND timestamp < ?
+    """
+    if amostra:
+        sql = f"SELECT * FROM ({sql} ORDER BY RANDOM() LIMIT ?)"
+        params += (amostra,)
+    with get_db_connection() as conn:
+        df = pd.read_sql_query(sql + " ORDER BY timestamp ASC", conn, params=params,
+                               parse_dates=_PARSE_TIMESTAMP, index_col="timestamp")
+    return _para_horario_local(df)
+
+def get_leituras_periodo(data_inicio, data_fim, amostra: Optional[int] = None):
+    """Obtém as leituras do período selecionado, filtradas no próprio SQL"""
+    try:
+        return _get_leituras_periodo_cached(data_inicio, data_fim, amostra, _db_version())
+    except Exception as e:
+        st.error(f"Erro ao carregar dados do período: {e}")
+        return pd.DataFrame()
+
+@st.cache_data(ttl=5, show_spinner=False)
+def _get_periodo_stats_cached(data_inicio, data_fim, version):
+    """Agrega as métricas do período em uma única consulta"""
+    with get_db_connection() as conn:
+        row = conn.execute("""
+            SELECT COUNT(*), AVG(umidade), AVG(ph_estimado), AVG(temperatura),
+                   SUM(bomba_ligada), SUM(emergencia)
+            FROM leituras_sensores 
+            WHERE timestamp >= ? AND timestamp < ?
+        """, _limites_periodo(data_inicio, data_fim)).fetchone()
+    if not row or not row[0]:
+        return None
+    return {
+        'total': row[0],
+        'umidade_media': row[1],
+        'ph_medio': row[2],
+        'temperatura_media': row[3],
+        'irrigacoes': int(row[4] or 0),
+        'emergencias': int(row[5] or 0),
+    }
+
+def get_periodo_stats(data_inicio, data_fim):
+    """Obtém médias e totais do período (None se não houver leituras)"""
+    try:
+        return _get_periodo_stats_cached(data_inicio, data_fim, _db_version())
+    except Exception as e:
+        st.error(f"Erro ao calcular estatísticas do período: {e}")
+        return None
+
+@st.cache_data(ttl=5, show_spinner=False)
+def _get_histograma_umidade_cached(data_inicio, data_fim, largura, version):
+    """Contagem de leituras por faixa de umidade, agrupada no SQL"""
+    with get_db_connection() as conn:
+        return pd.read_sql_query("""
+            SELECT CAST(umidade / ? AS INT) * ? AS faixa, COUNT(*) AS leituras
+            FROM leituras_sensores 
+            WHERE timestamp >= ? AND timestamp < ?
+            GROUP BY faixa
+            ORDER BY faixa
+        """, conn, params=(largura, largura) + _limites_periodo(data_inicio, data_fim))
+
+def get_histograma_umidade(data_inicio, data_fim, largura: int = 5):
+    """Obtém o histograma de umidade do período com faixas de *largura* pontos"""
+    try:
+        return _get_histograma_umidade_cached(data_inicio, data_fim, largura, _db_version())
+    except Exception as e:
+        st.error(f"Erro ao calcular distribuição de umidade: {e}")
+        return pd.DataFrame()
+
+@st.cache_data(ttl=5, show_spinner=False)
+def _get_latest_reading_cached(version):
+    """Consulta a última leitura; *version* apenas diferencia as entradas do cache"""
+    with get_db_connection() as conn:
+        cursor = conn.execute(_LATEST_SQL)
+        row = cursor.fetchone()
+        if row:
+            columns = [desc[0] for desc in cursor.description]
+            return dict(zip(columns, row))
+        return None
+
 def get_latest_reading():
     """Obtém a última leitura"""
     try:
-        with get_db_connection() as conn:
-            cursor = conn.execute("""
-                SELECT * FROM leituras_sensores 
-                ORDER BY timestamp DESC 
-                LIMIT 1
-            """)
-            row = cursor.fetchone()
-            if row:
-                columns = [desc[0] for desc in cursor.description]
-                return dict(zip(columns, row))
-            return None
+        return _get_latest_reading_cached(_db_version())
     except Exception as e:
         st.error(f"Erro ao obter última leitura: {e}")
         return None
 
 def update_leitura(leitura_id, campo, valor):
-    """Atualiza uma leitura"""
+    """Atualiza uma leitura; *campo* precisa estar em _CAMPOS_ATUALIZAVEIS"""
+    sql = _UPDATE_SQL.get(campo)
+    if sql is None:
+        raise ValueError(f"Campo não atualizável: {campo!r}")
     try:
         with get_db_connection() as conn:
-            conn.execute(f"""
-                UPDATE leituras_sensores 
-                SET {campo} = ? 
-                WHERE id = ?
-            """, (valor, leitura_id))
-            conn.commit()
-            return conn.rowcount > 0
+            cursor = conn.execute(sql, (valor, leitura_id))
+            _invalidate_read_cache()
+            _descartar_recentes()
+            return cursor.rowcount > 0
     except Exception as e:
         st.error(f"Erro ao atualizar leitura: {e}")
         return False
@@ -192,36 +517,121 @@ def delete_leitura(leitura_id):
     """Deleta uma leitura"""
     try:
         with get_db_connection() as conn:
-            conn.execute("DELETE FROM leituras_sensores WHERE id = ?", (leitura_id,))
-            conn.commit()
-            return conn.rowcount > 0
+            cursor = conn.execute(_DELETE_SQL, (leitura_id,))
+            _invalidate_read_cache()
+            _descartar_recentes()
+            return cursor.rowcount > 0
     except Exception as e:
         st.error(f"Erro ao deletar leitura: {e}")
         return False
 
+@st.cache_data(show_spinner=False)
+def _estatisticas_descritivas(df):
+    """Resumo estatístico (describe) do DataFrame de leituras"""
+    return df.describe()
+
+@st.cache_data(show_spinner=False)
+def _matriz_correlacao(df, colunas):
+    """Matriz de correlação das colunas numéricas informadas"""
+    return df[list(colunas)].corr()
+
+# Funções de apoio aos gráficos
+# As figuras são recriadas a cada rerun: sem animações e preservando zoom/pan
+PLOTLY_CONFIG = {"displaylogo": False, "responsive": False}
+PLOTLY_LAYOUT_ESTAVEL = dict(uirevision="keep", transition={"duration": 0})
+
+def _plotly():
+    """Importa o plotly sob demanda: só as páginas com gráficos pagam o custo.
+
+    Nos reruns seguintes o import sai do cache de módulos do Python.
+    """
+    import plotly.express as px
+    import plotly.graph_objects as go
+    return px, go
+
+def exibir_grafico(fig):
+    """Renderiza a figura sem transições e com configuração estável"""
+    fig.update_layout(**PLOTLY_LAYOUT_ESTAVEL)
+    st.plotly_chart(fig, use_container_width=True, config=PLOTLY_CONFIG)
+
+def downsample(serie: pd.Series, max_points: int = 200) -> pd.DataFrame:
+    """Agrupa a série em até *max_points* faixas de tempo (média, mínimo e máximo).
+
+    Séries que já cabem no limite são devolvidas ponto a ponto.
+    """
+    if len(serie) <= max_points:
+        return pd.DataFrame({'media': serie, 'minimo': serie, 'maximo': serie})
+    faixas = pd.cut(serie.index.asi8, max_points, labels=False)
+    resumo = serie.groupby(faixas).agg(['mean', 'min', 'max'])
+    resumo.columns = ['media', 'minimo', 'maximo']
+    resumo.index = serie.index.to_series().groupby(faixas).first().values
+    return resumo
+
+def adicionar_serie(fig, serie: pd.Series, nome: str, cor: str, yaxis: str = 'y',
+                    max_points: int = 200, **line_kwargs):
+    """Adiciona a série ao gráfico já reduzida; faixas agregadas ganham banda mín/máx"""
+    _, go = _plotly()
+    resumo = downsample(serie, max_points)
+    if len(serie) > max_points:
+        fig.add_trace(go.Scatter(
+            x=resumo.index, y=resumo['maximo'], mode='lines',
+            line=dict(color=cor, width=0), showlegend=False, hoverinfo='skip', yaxis=yaxis
+        ))
+        fig.add_trace(go.Scatter(
+            x=resumo.index, y=resumo['minimo'], mode='lines', fill='tonexty',
+            line=dict(color=cor, width=0), opacity=0.2, showlegend=False, hoverinfo='skip',
+            yaxis=yaxis
+        ))
+    fig.add_trace(go.Scatter(
+        x=resumo.index,
+        y=resumo['media'],
+        mode='lines' if len(resumo) > 100 else 'lines+markers',
+        name=nome,
+        line=dict(color=cor, **line_kwargs),
+        yaxis=yaxis
+    ))
+
 # Funções de simulação
-def simulate_sensor_data():
+# Gerador compartilhado pelos simuladores; testes podem injetar um com seed
+_RNG = np.random.default_rng(seed=None)
+
+def simulate_sensor_data(rng: Optional[np.random.Generator] = None):
     """Simula dados de sensores"""
-    umidade = random.uniform(10, 70)
-    ph = random.uniform(4.0, 8.0)
-    temperatura = random.uniform(15, 35)
-    fosforo = random.choice([True, False])
-    potassio = random.choice([True, False])
+    rng = rng or _RNG
+    umidade = float(rng.uniform(10, 70))
+    ph = float(rng.uniform(4.0, 8.0))
+    temperatura = float(rng.uniform(15, 35))
+    fosforo = bool(rng.integers(0, 2))
+    potassio = bool(rng.integers(0, 2))
     
-    # Lógica de irrigação
-    bomba_ligada = False
-    emergencia = False
+    # Lógica de irrigação (umidade crítica já implica umidade abaixo do mínimo)
+    bomba_ligada = umidade < _UMID_MIN
+    emergencia = umidade < _UMID_CRIT or ph < _PH_CRIT_LO or ph > _PH_CRIT_HI
     
-    if umidade < CONFIG['UMIDADE_CRITICA_BAIXA']:
-        bomba_ligada = True
-        emergencia = True
-    elif umidade < CONFIG['UMIDADE_MINIMA_PARA_IRRIGAR']:
-        bomba_ligada = True
-    elif umidade > CONFIG['UMIDADE_ALTA_PARAR_IRRIGACAO']:
-        bomba_ligada = False
+    return {
+        'umidade': umidade,
+        'ph_estimado': ph,
+        'temperatura': temperatura,
+        'fosforo_presente': fosforo,
+        'potassio_presente': potassio,
+        'bomba_ligada': bomba_ligada,
+        'emergencia': emergencia
+    }
+
+def simulate_sensor_data_batch(n: int, rng: Optional[np.random.Generator] = None) -> Dict[str, np.ndarray]:
+    """Simula *n* leituras de uma vez, com a mesma lógica de simulate_sensor_data"""
+    rng = rng or _RNG
+    umidade = rng.uniform(10, 70, n)
+    ph = rng.uniform(4.0, 8.0, n)
+    temperatura = rng.uniform(15, 35, n)
+    fosforo = rng.integers(0, 2, n, dtype=bool)
+    potassio = rng.integers(0, 2, n, dtype=bool)
     
-    if ph < CONFIG['PH_CRITICO_MINIMO'] or ph > CONFIG['PH_CRITICO_MAXIMO']:
-        emergencia = True
+    crit = umidade < _UMID_CRIT
+    low = umidade < _UMID_MIN
+    ph_crit = (ph < _PH_CRIT_LO) | (ph > _PH_CRIT_HI)
+    bomba_ligada = crit | low
+    emergencia = crit | ph_crit
     
     return {
         'umidade': umidade,
@@ -238,19 +648,19 @@ def run_what_if_simulation(umidade, ph, temperatura, fosforo, potassio):
     bomba_ligada = False
     justificativa = []
     
-    if umidade < CONFIG['UMIDADE_CRITICA_BAIXA']:
+    if umidade < _UMID_CRIT:
         bomba_ligada = True
         justificativa.append("Umidade crítica - irrigação emergencial")
-    elif umidade < CONFIG['UMIDADE_MINIMA_PARA_IRRIGAR']:
+    elif umidade < _UMID_MIN:
         bomba_ligada = True
         justificativa.append("Umidade baixa - irrigação necessária")
-    elif umidade > CONFIG['UMIDADE_ALTA_PARAR_IRRIGACAO']:
+    elif umidade > _UMID_HI:
         bomba_ligada = False
         justificativa.append("Umidade alta - não irrigar")
     else:
         justificativa.append("Umidade adequada")
     
-    if ph < CONFIG['PH_CRITICO_MINIMO'] or ph > CONFIG['PH_CRITICO_MAXIMO']:
+    if ph < _PH_CRIT_LO or ph > _PH_CRIT_HI:
         justificativa.append("pH crítico - atenção necessária")
     
     if not fosforo or not potassio:
@@ -258,18 +668,51 @@ def run_what_if_simulation(umidade, ph, temperatura, fosforo, potassio):
     
     return bomba_ligada, "; ".join(justificativa)
 
+# Decisão em lote (mapas what-if): mesmas regras de simulate_sensor_data
+def _decidir_lote_numpy(umidade, ph, umid_crit, umid_min, ph_crit_lo, ph_crit_hi):
+    """Versão vetorizada com máscaras NumPy"""
+    bomba = umidade < umid_min
+    emergencia = (umidade < umid_crit) | (ph < ph_crit_lo) | (ph > ph_crit_hi)
+    return bomba, emergencia
+
+if njit is not None:
+    @njit(cache=True)
+    def _decidir_lote(umidade, ph, umid_crit, umid_min, ph_crit_lo, ph_crit_hi):
+        """Kernel compilado: um único laço sobre as leituras"""
+        n = umidade.shape[0]
+        bomba = np.empty(n, dtype=np.bool_)
+        emergencia = np.empty(n, dtype=np.bool_)
+        for i in range(n):
+            u = umidade[i]
+            p = ph[i]
+            bomba[i] = u < umid_min
+            emergencia[i] = u < umid_crit or p < ph_crit_lo or p > ph_crit_hi
+        return bomba, emergencia
+else:
+    _decidir_lote = _decidir_lote_numpy
+
+def run_what_if_simulation_batch(umidade, ph) -> np.ndarray:
+    """Decide vários cenários de uma vez.
+
+    Devolve um array int8 no formato de *umidade*: 0 = bomba desligada,
+    1 = bomba ligada, 2 = emergência.
+    """
+    umidade = np.asarray(umidade, dtype=np.float64)
+    ph = np.broadcast_to(np.asarray(ph, dtype=np.float64), umidade.shape)
+    bomba, emergencia = _decidir_lote(
+        np.ascontiguousarray(umidade.ravel()), np.ascontiguousarray(ph.ravel()),
+        _UMID_CRIT, _UMID_MIN, _PH_CRIT_LO, _PH_CRIT_HI
+    )
+    codigos = np.where(emergencia, 2, bomba).astype(np.int8)
+    return codigos.reshape(umidade.shape)
+
 # Inicialização
 if not init_database():
     st.error("Falha na inicialização do banco de dados")
     st.stop()
 
 # Interface principal
-st.markdown("""
-    <div class="main-header">
-        <h1>🌱 FarmTech ERP</h1>
-        <p>Sistema Unificado de Gerenciamento de Irrigação Inteligente</p>
-    </div>
-""", unsafe_allow_html=True)
+st.markdown(_HEADER_HTML, unsafe_allow_html=True)
 
 # Sidebar
 st.sidebar.title("📋 Menu de Navegação")
@@ -287,6 +730,7 @@ page = st.sidebar.selectbox(
 # PAINEL DE CONTROLE
 if page == "🏠 Painel de Controle":
     st.header("🏠 Painel de Controle")
+    px, go = _plotly()
     
     col1, col2 = st.columns([3, 1])
     
@@ -322,10 +766,10 @@ if page == "🏠 Painel de Controle":
             if ultima_leitura['emergencia']:
                 alertas.append("🔴 EMERGÊNCIA: Condições críticas!")
             
-            if ultima_leitura['umidade'] < 15:
+            if ultima_leitura['umidade'] < _UMID_CRIT:
                 alertas.append("⚠️ Umidade criticamente baixa!")
             
-            if ultima_leitura['ph_estimado'] < 4.5 or ultima_leitura['ph_estimado'] > 7.5:
+            if ultima_leitura['ph_estimado'] < _PH_CRIT_LO or ultima_leitura['ph_estimado'] > _PH_CRIT_HI:
                 alertas.append("⚠️ pH fora da faixa segura!")
             
             if alertas:
@@ -338,114 +782,102 @@ if page == "🏠 Painel de Controle":
     
     with col2:
         st.subheader("ℹ️ Informações")
-        st.info(f"Última atualização: {datetime.now().strftime('%H:%M:%S')}")
+        st.info(f"Última atualização: {_agora_local().strftime('%H:%M:%S')}")
         
         if ultima_leitura:
-            st.write(f"**Última leitura:** {ultima_leitura['timestamp']}")
+            st.write(f"**Última leitura:** {_de_epoch(ultima_leitura['timestamp']):%Y-%m-%d %H:%M:%S}")
             st.write("**Nutrientes:**")
             st.write(f"- Fósforo: {'✅' if ultima_leitura['fosforo_presente'] else '❌'}")
             st.write(f"- Potássio: {'✅' if ultima_leitura['potassio_presente'] else '❌'}")
     
     # Gráfico de tendência
     st.subheader("📈 Tendência Recente")
-    df_hist = get_leituras(limit=24)
+    df_hist = get_tendencia_recente(24, ultima_leitura)
     
     if not df_hist.empty:
         fig = go.Figure()
         
-        fig.add_trace(go.Scatter(
-            x=df_hist.index,
-            y=df_hist['umidade'],
-            mode='lines+markers',
-            name='Umidade (%)',
-            line=dict(color='#2196F3')
-        ))
-        
-        fig.add_trace(go.Scatter(
-            x=df_hist.index,
-            y=df_hist['ph_estimado'] * 10,
-            mode='lines+markers',
-            name='pH (x10)',
-            line=dict(color='#FF9800'),
-            yaxis='y2'
-        ))
+        adicionar_serie(fig, df_hist['umidade'], 'Umidade (%)', '#2196F3')
+        adicionar_serie(fig, df_hist['ph_estimado'], 'pH', '#FF9800', yaxis='y2')
         
         fig.update_layout(
             title="Tendência de Umidade e pH",
             xaxis_title="Data/Hora",
             yaxis_title="Umidade (%)",
-            yaxis2=dict(title="pH (x10)", overlaying='y', side='right'),
+            yaxis2=dict(title="pH", overlaying='y', side='right', range=[0, 14]),
             hovermode='x unified'
         )
         
-        st.plotly_chart(fig, use_container_width=True)
+        exibir_grafico(fig)
     else:
         st.warning("Nenhum dado histórico disponível")
 
 # ANÁLISE HISTÓRICA
 elif page == "📊 Análise Histórica":
     st.header("📊 Análise Histórica")
+    px, go = _plotly()
     
-    df_hist = get_leituras(limit=1000)
-    
-    if not df_hist.empty:
+    if get_latest_reading():
         col1, col2 = st.columns(2)
         
         with col1:
             data_inicio = st.date_input(
                 "Data Inicial",
-                value=(datetime.now() - timedelta(days=7)).date()
+                value=(_agora_local() - timedelta(days=7)).date()
             )
         
         with col2:
             data_fim = st.date_input(
                 "Data Final",
-                value=datetime.now().date()
+                value=_agora_local().date()
             )
         
-        # Filtrar dados
-        mask = (df_hist.index.date >= data_inicio) & (df_hist.index.date <= data_fim)
-        df_periodo = df_hist.loc[mask]
+        # Agregações feitas no SQL
+        stats = get_periodo_stats(data_inicio, data_fim)
         
-        if not df_periodo.empty:
+        if stats:
             st.subheader("📈 Estatísticas do Período")
             
             col1, col2, col3, col4 = st.columns(4)
             
             with col1:
-                st.metric("Umidade Média", f"{df_periodo['umidade'].mean():.1f}%")
+                st.metric("Umidade Média", f"{stats['umidade_media']:.1f}%")
             
             with col2:
-                st.metric("pH Médio", f"{df_periodo['ph_estimado'].mean():.1f}")
+                st.metric("pH Médio", f"{stats['ph_medio']:.1f}")
             
             with col3:
-                st.metric("Temp. Média", f"{df_periodo['temperatura'].mean():.1f}°C")
+                temp_media = stats['temperatura_media']
+                st.metric("Temp. Média", f"{temp_media:.1f}°C" if temp_media is not None else "N/A")
             
             with col4:
-                st.metric("Irrigações", int(df_periodo['bomba_ligada'].sum()))
+                st.metric("Irrigações", stats['irrigacoes'])
             
             # Gráficos
-            fig_hist = px.histogram(df_periodo.reset_index(), x='umidade', 
-                                   title="Distribuição de Umidade")
-            st.plotly_chart(fig_hist, use_container_width=True)
+            df_faixas = get_histograma_umidade(data_inicio, data_fim)
+            fig_hist = px.bar(df_faixas, x='faixa', y='leituras',
+                              title="Distribuição de Umidade",
+                              labels={'faixa': 'umidade', 'leituras': 'count'})
+            exibir_grafico(fig_hist)
             
-            fig_scatter = px.scatter(df_periodo.reset_index(), 
+            df_amostra = get_leituras_periodo(data_inicio, data_fim, amostra=5000)
+            fig_scatter = px.scatter(df_amostra.reset_index(), 
                                    x='umidade', y='ph_estimado',
                                    title="Relação Umidade vs pH")
-            st.plotly_chart(fig_scatter, use_container_width=True)
+            exibir_grafico(fig_scatter)
             
             # Sugestões
             st.subheader("💡 Sugestões")
-            umidade_media = df_periodo['umidade'].mean()
-            ph_medio = df_periodo['ph_estimado'].mean()
+            umidade_media = stats['umidade_media']
+            ph_medio = stats['ph_medio']
             
-            if umidade_media < 20:
+            if umidade_media < _UMID_MIN:
                 st.info("💡 Umidade média baixa. Considere aumentar irrigação.")
             
-            if ph_medio < 5.5 or ph_medio > 6.5:
+            if ph_medio < _PH_LO or ph_medio > _PH_HI:
                 st.info("💡 pH fora da faixa ideal. Considere correção do solo.")
             
-            eventos_criticos = len(df_periodo[df_periodo['emergencia'] == True])
+            eventos_criticos = stats['emergencias']
             if eventos_criticos > 0:
                 st.warning(f"⚠️ {eventos_criticos} eventos críticos no período.")
         else:
@@ -466,8 +898,8 @@ elif page == "⚙️ Gerenciamento de Dados":
             col1, col2 = st.columns(2)
             
             with col1:
-                data = st.date_input("Data", value=datetime.now().date())
-                hora = st.time_input("Hora", value=datetime.now().time())
+                data = st.date_input("Data", value=_agora_local().date())
+                hora = st.time_input("Hora", value=_agora_local().time())
                 umidade = st.number_input("Umidade (%)", min_value=0.0, max_value=100.0, value=30.0)
                 ph = st.number_input("pH", min_value=0.0, max_value=14.0, value=6.5)
                 temperatura = st.number_input("Temperatura (°C)", min_value=-10.0, max_value=50.0, value=25.0)
@@ -492,9 +924,7 @@ elif page == "⚙️ Gerenciamento de Dados":
         
         with st.form("form_atualizar"):
             leitura_id = st.number_input("ID da Leitura", min_value=1, value=1)
-            campo = st.selectbox("Campo", ["umidade", "ph_estimado", "temperatura", 
-                                         "fosforo_presente", "potassio_presente", 
-                                         "bomba_ligada", "emergencia"])
+            campo = st.selectbox("Campo", _CAMPOS_ATUALIZAVEIS)
             
             if campo in ["fosforo_presente", "potassio_presente", "bomba_ligada", "emergencia"]:
                 novo_valor = st.checkbox("Novo Valor", value=False)
@@ -537,7 +967,7 @@ elif page == "🧪 Simulação":
         with col1:
             if st.button("🎲 Gerar Dados Simulados"):
                 dados = simulate_sensor_data()
-                timestamp = datetime.now()
+                timestamp = _agora_local()
                 
                 leitura_id = add_leitura(
                     timestamp,
@@ -557,23 +987,25 @@ elif page == "🧪 Simulação":
         
         with col2:
             if st.button("📈 Gerar Múltiplos Dados"):
-                for i in range(10):
-                    dados = simulate_sensor_data()
-                    timestamp = datetime.now() - timedelta(minutes=i*5)
-                    
-                    add_leitura(
-                        timestamp,
-                        dados['umidade'],
-                        dados['ph_estimado'],
-                        dados['fosforo_presente'],
-                        dados['potassio_presente'],
-                        dados['temperatura'],
-                        dados['bomba_ligada'],
-                        dados['emergencia'],
-                        "Simulação Múltipla"
-                    )
+                n = 10
+                agora = _agora_local()
+                dados = simulate_sensor_data_batch(n)
+                timestamps = (_para_epoch(agora) - np.arange(n) * 300).tolist()
+                # tolist() converte para tipos nativos, aceitos pelo sqlite3
+                rows = list(zip(
+                    timestamps,
+                    dados['umidade'].tolist(),
+                    dados['ph_estimado'].tolist(),
+                    dados['fosforo_presente'].tolist(),
+                    dados['potassio_presente'].tolist(),
+                    dados['temperatura'].tolist(),
+                    dados['bomba_ligada'].tolist(),
+                    dados['emergencia'].tolist(),
+                    ["Simulação Múltipla"] * n
+                ))
                 
-                st.success("✅ 10 registros simulados gerados!")
+                if add_leituras_bulk(rows):
+                    st.success(f"✅ {len(rows)} registros simulados gerados!")
     
     with tab2:
         st.subheader("💡 Simulador What-If")
@@ -605,17 +1037,17 @@ elif page == "🧪 Simulação":
             col1, col2, col3 = st.columns(3)
             
             with col1:
-                if sim_umidade < 15:
+                if sim_umidade < _UMID_CRIT:
                     st.error("🚨 Umidade Crítica")
-                elif sim_umidade < 20:
+                elif sim_umidade < _UMID_MIN:
                     st.warning("⚠️ Umidade Baixa")
                 else:
                     st.success("✅ Umidade OK")
             
             with col2:
-                if sim_ph < 4.5 or sim_ph > 7.5:
+                if sim_ph < _PH_CRIT_LO or sim_ph > _PH_CRIT_HI:
                     st.error("🚨 pH Crítico")
-                elif sim_ph < 5.5 or sim_ph > 6.5:
+                elif sim_ph < _PH_LO or sim_ph > _PH_HI:
                     st.warning("⚠️ pH Subótimo")
                 else:
                     st.success("✅ pH Ideal")
@@ -627,10 +1059,38 @@ elif page == "🧪 Simulação":
                     st.warning("⚠️ Nutriente Parcial")
                 else:
                     st.error("🚨 Sem Nutrientes")
+        
+        if st.checkbox("🗺️ Mostrar mapa de decisões (umidade × pH)"):
+            px, go = _plotly()
+            eixo_umidade = np.linspace(0.0, 100.0, 201)
+            eixo_ph = np.linspace(0.0, 14.0, 141)
+            grade_umidade, grade_ph = np.meshgrid(eixo_umidade, eixo_ph)
+            decisoes = run_what_if_simulation_batch(grade_umidade, grade_ph)
+            
+            fig_mapa = px.imshow(
+                decisoes, x=eixo_umidade, y=eixo_ph, origin='lower', aspect='auto',
+                zmin=0, zmax=2,
+                color_continuous_scale=[
+                    [0.0, '#9E9E9E'], [1/3, '#9E9E9E'],
+                    [1/3, '#2196F3'], [2/3, '#2196F3'],
+                    [2/3, '#F44336'], [1.0, '#F44336']
+                ],
+                labels=dict(x="Umidade (%)", y="pH", color="Decisão"),
+                title="Decisão de irrigação por cenário"
+            )
+            fig_mapa.update_coloraxes(colorbar=dict(
+                tickvals=[0, 1, 2], ticktext=["Desligada", "Ligada", "Emergência"]
+            ))
+            fig_mapa.add_trace(go.Scatter(
+                x=[sim_umidade], y=[sim_ph], mode='markers', name='Cenário atual',
+                marker=dict(color='white', size=12, line=dict(color='black', width=2))
+            ))
+            exibir_grafico(fig_mapa)
 
 # INTELIGÊNCIA ARTIFICIAL
 elif page == "🤖 Inteligência Artificial":
     st.header("🤖 Inteligência Artificial")
+    px, go = _plotly()
     
     df_hist = get_leituras(limit=1000)
     
@@ -642,16 +1102,16 @@ elif page == "🤖 Inteligência Artificial":
             
             # Estatísticas descritivas
             st.write("**Estatísticas dos Dados:**")
-            st.dataframe(df_hist.describe())
+            st.dataframe(_estatisticas_descritivas(df_hist))
             
             # Correlações
             st.subheader("🔗 Correlações")
-            numeric_cols = ['umidade', 'ph_estimado', 'temperatura']
-            corr_matrix = df_hist[numeric_cols].corr()
+            numeric_cols = ('umidade', 'ph_estimado', 'temperatura')
+            corr_matrix = _matriz_correlacao(df_hist, numeric_cols)
             
             fig_corr = px.imshow(corr_matrix, text_auto=True, 
                                title="Matriz de Correlação")
-            st.plotly_chart(fig_corr, use_container_width=True)
+            exibir_grafico(fig_corr)
             
             # Padrões
             st.subheader("📈 Padrões Identificados")
@@ -675,27 +1135,19 @@ elif page == "🤖 Inteligência Artificial":
                 std_umidade = df_recent['umidade'].std()
                 
                 # Gerar previsão para próximas 6 horas
-                future_times = [datetime.now() + timedelta(hours=i) for i in range(1, 7)]
-                forecast_values = []
+                future_times = [_agora_local() + timedelta(hours=i) for i in range(1, 7)]
                 
-                for i in range(6):
-                    # Previsão com tendência e ruído
-                    trend = -0.5 if media_umidade > 50 else 0.5  # Tendência baseada na umidade atual
-                    noise = np.random.normal(0, std_umidade * 0.5)
-                    forecast = media_umidade + (trend * i) + noise
-                    forecast_values.append(max(0, min(100, forecast)))  # Manter entre 0-100%
+                # Previsão com tendência e ruído, calculada de uma vez para os 6 passos
+                trend = -0.5 if media_umidade > 50 else 0.5  # Tendência baseada na umidade atual
+                passos = np.arange(6)
+                noise = np.random.normal(0, std_umidade * 0.5, passos.size)
+                forecast_values = np.clip(media_umidade + trend * passos + noise, 0, 100)  # Manter entre 0-100%
                 
                 # Gráfico de previsão
                 fig_forecast = go.Figure()
                 
                 # Dados históricos
-                fig_forecast.add_trace(go.Scatter(
-                    x=df_recent.index,
-                    y=df_recent['umidade'],
-                    mode='lines+markers',
-                    name='Histórico',
-                    line=dict(color='#2196F3')
-                ))
+                adicionar_serie(fig_forecast, df_recent['umidade'], 'Histórico', '#2196F3')
                 
                 # Previsão
                 fig_forecast.add_trace(go.Scatter(
@@ -712,13 +1164,14 @@ elif page == "🤖 Inteligência Artificial":
                     yaxis_title="Umidade (%)",
                     hovermode='x unified'
                 )
+                fig_forecast.update_xaxes(type="date", rangeslider_visible=False)
                 
-                st.plotly_chart(fig_forecast, use_container_width=True)
+                exibir_grafico(fig_forecast)
                 
                 # Alertas de previsão
                 st.subheader("⚠️ Alertas de Previsão")
-                min_forecast = min(forecast_values)
-                max_forecast = max(forecast_values)
+                min_forecast = forecast_values.min()
+                max_forecast = forecast_values.max()
                 
                 if min_forecast < 20:
                     st.warning(f"🚨 Umidade pode cair para {min_forecast:.1f}% - preparar irrigação!")
@@ -726,18 +1179,11 @@ elif page == "🤖 Inteligência Artificial":
                 if max_forecast > 80:
                     st.info(f"💧 Umidade pode subir para {max_forecast:.1f}% - suspender irrigação!")
                 
-                if not any(v < 20 for v in forecast_values):
+                if not (forecast_values < 20).any():
                     st.success("✅ Níveis de umidade estáveis previstos")
     else:
         st.warning("Dados insuficientes para análise de IA. Adicione mais registros.")
 
 # Rodapé
 st.markdown("---")
-st.markdown("""
-    <div style="text-align: center; color: #666; padding: 1rem;">
-        <small>
-            🌱 FarmTech ERP v2.0 Simplificado | Desenvolvido por Diogo Zequini + Claude AI | 
-            © 2025 | Sistema Único de Irrigação Inteligente
-        </small>
-    </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+st.markdown(_FOOTER_HTML, unsafe_allow_html=True)
\ No newline at end of file
@@ -4,10 +4,50 @@ Carrega configurações do arquivo erp_config.yaml na raiz do projeto.
 """
 import os
 import yaml
+from functools import lru_cache
 from pathlib import Path
+from typing import NamedTuple, Optional
+
+
+class LogicaCfg(NamedTuple):
+    """Limiares da lógica do ESP32, com acesso por atributo."""
+    UMIDADE_CRITICA_BAIXA: float = 15.0
+    UMIDADE_MINIMA_PARA_IRRIGAR: float = 20.0
+    UMIDADE_ALTA_PARAR_IRRIGACAO: float = 60.0
+    PH_IDEAL_MINIMO: float = 5.5
+    PH_IDEAL_MAXIMO: float = 6.5
+    PH_CRITICO_MINIMO: float = 4.5
+    PH_CRITICO_MAXIMO: float = 7.5
+
+
+@lru_cache(maxsize=8)
+def _build_logica_cfg(itens: tuple) -> LogicaCfg:
+    return LogicaCfg(**{k: float(v) for k, v in itens if k in LogicaCfg._fields})
+
+
+def get_logica_cfg(config: Optional[dict] = None) -> LogicaCfg:
+    """Retorna a seção logica_esp32 como LogicaCfg (montado uma vez por conteúdo)."""
+    logica = (config if config is not None else get_config()).get('logica_esp32') or {}
+    return _build_logica_cfg(tuple(sorted(logica.items())))
+
+
+# Loader em C (libyaml) quando disponível; senão o SafeLoader puro Python
+_YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+@lru_cache(maxsize=8)
+def _load_config(path: str, mtime_ns: int):
+    """Lê e interpreta o YAML; *mtime_ns* invalida o cache quando o arquivo muda."""
+    with open(path, 'rb') as f:
+        return yaml.load(f, Loader=_YAML_LOADER)
+
 
 def get_config():
-    """Retorna objeto de configuração carregado do erp_config.yaml."""
+    """Retorna objeto de configuração carregado do erp_config.yaml.
+
+    O resultado é compartilhado entre chamadas enquanto o arquivo não mudar;
+    trate-o como somente leitura.
+    """
     
     # Encontrar o arquivo de configuração na raiz do projeto
     current_dir = Path(__file__).parent
@@ -18,22 +58,22 @@ def get_config():
     default_config = {
         'db_name': 'backend/data/farmtech.db',
         'table_name': 'leituras_sensores_phd_v2',
-        'logica_esp32': {
-            'UMIDADE_CRITICA_BAIXA': 15.0,
-            'UMIDADE_MINIMA_PARA_IRRIGAR': 20.0,
-            'UMIDADE_ALTA_PARAR_IRRIGACAO': 60.0,
-            'PH_IDEAL_MINIMO': 5.5,
-            'PH_IDEAL_MAXIMO': 6.5,
-            'PH_CRITICO_MINIMO': 4.5,
-            'PH_CRITICO_MAXIMO': 7.5,
-        },
+        'logica_esp32': dict(LogicaCfg()._asdict()),
         'forecast_settings': {
             'num_leituras_futuras': 6,
             'intervalo_leitura_minutos': 5,
             'alerta_forecast_ativo': True,
             'arima_p': 1,
             'arima_d': 1,
-            'arima_q': 1
+            'arima_q': 1,
+            'batch_size': 500,
+            'flush_interval_s': 30
+        },
+        'stream_settings': {
+            'ws_ativo': False,
+            'ws_host': 'localhost',
+            'ws_port': 8765,
+            'ws_host_cliente': None
         },
         'custo_settings': {
             'custo_agua_reais_por_m3': 5.00,
@@ -45,15 +85,15 @@ def get_config():
     }
     
     try:
-        if config_path.exists():
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
-                return config if config else default_config
-        else:
+        try:
+            mtime_ns = config_path.stat().st_mtime_ns
+        except FileNotFoundError:
             # Criar arquivo de configuração se não existir
             with open(config_path, 'w', encoding='utf-8') as f:
                 yaml.dump(default_config, f, default_flow_style=False)
             return default_config
+        config = _load_config(str(config_path), mtime_ns)
+        return config if config else default_config
     except Exception as e:
         print(f"Erro ao carregar configuração: {e}")
         return default_config 
\ No newline at end of file
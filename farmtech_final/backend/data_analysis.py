@@ -7,17 +7,50 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
+import warnings
 from typing import Tuple
 
+from .config_manager import LogicaCfg
+
+try:
+    from numba import njit
+except ImportError:  # numba é opcional; sem ele a grade usa máscaras NumPy
+    njit = None
+
 # --- Estatísticas Descritivas ---
+_STATS_COLS = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+
 def descriptive_stats(df: pd.DataFrame) -> pd.DataFrame:
-    return df.describe().T
+    """Equivalente a df.describe().T para as colunas numéricas, com reduções NumPy."""
+    num = df.select_dtypes(include=np.number)
+    if num.shape[1] == 0 or num.shape[0] == 0:  # Reduções NumPy não aceitam eixo vazio
+        return df.describe().T
+    a = num.to_numpy(dtype=np.float64)
+    with warnings.catch_warnings():  # colunas só com NaN geram NaN, como no pandas
+        warnings.simplefilter("ignore", RuntimeWarning)
+        stats = np.vstack([
+            np.count_nonzero(~np.isnan(a), axis=0),
+            np.nanmean(a, axis=0),
+            np.nanstd(a, axis=0, ddof=1),
+            np.nanmin(a, axis=0),
+            np.nanpercentile(a, [25, 50, 75], axis=0),
+            np.nanmax(a, axis=0),
+        ])
+    return pd.DataFrame(stats.T, index=num.columns, columns=_STATS_COLS)
 
 # --- Detecção de Anomalias ---
 def detect_anomalies(df: pd.DataFrame, col: str, z_thresh: float = 3.0) -> pd.DataFrame:
     if df.empty: return df.assign(anomalia=False)
-    z_scores = (df[col] - df[col].mean()) / df[col].std(ddof=0)
-    return df.assign(anomalia=np.abs(z_scores) > z_thresh)
+    # z-score calculado sobre o array NumPy, reaproveitando um único buffer
+    a = df[col].to_numpy(dtype=np.float64, copy=False)
+    z = np.empty_like(a)
+    with warnings.catch_warnings(), np.errstate(invalid="ignore", divide="ignore"):
+        # Coluna constante ou só com NaN: z vira NaN (nunca anomalia), sem avisos, como no pandas
+        warnings.simplefilter("ignore", RuntimeWarning)
+        np.subtract(a, np.nanmean(a), out=z)
+        np.divide(z, np.nanstd(a), out=z)
+    np.fabs(z, out=z)
+    return df.assign(anomalia=z > z_thresh)
 
 # --- Funções de Plotagem ---
 def plot_correlations(df: pd.DataFrame):
@@ -32,34 +65,88 @@ def plot_distribution(df: pd.DataFrame, column: str):
     return fig
 
 # --- Simulação da Lógica do ESP32 ---
-def simular_logica_irrigacao(umidade: float, ph: float, cfg_logica: dict):
-    params = cfg_logica
+def simular_logica_irrigacao(umidade: float, ph: float, cfg: LogicaCfg):
+    """Reproduz a decisão do ESP32; *cfg* vem de config_manager.get_logica_cfg()."""
     decisao, justificativa = "Manter bomba desligada", "Condições normais."
     emergencia = False
 
-    if umidade < params['UMIDADE_CRITICA_BAIXA'] or not (params['PH_CRITICO_MINIMO'] < ph < params['PH_CRITICO_MAXIMO']):
+    if umidade < cfg.UMIDADE_CRITICA_BAIXA or not (cfg.PH_CRITICO_MINIMO < ph < cfg.PH_CRITICO_MAXIMO):
         decisao, emergencia = "Ligar bomba (EMERGÊNCIA)", True
-        justificativa = f"EMERGÊNCIA: Umidade ({umidade}%) abaixo do crítico." if umidade < params['UMIDADE_CRITICA_BAIXA'] else f"EMERGÊNCIA: pH ({ph}) fora da faixa crítica."
+        justificativa = f"EMERGÊNCIA: Umidade ({umidade}%) abaixo do crítico." if umidade < cfg.UMIDADE_CRITICA_BAIXA else f"EMERGÊNCIA: pH ({ph}) fora da faixa crítica."
         return {'decisao': decisao, 'justificativa': justificativa, 'emergencia': emergencia}
 
-    if umidade < params['UMIDADE_MINIMA_PARA_IRRIGAR']:
-        if not (params['PH_IDEAL_MINIMO'] < ph < params['PH_IDEAL_MAXIMO']):
+    if umidade < cfg.UMIDADE_MINIMA_PARA_IRRIGAR:
+        if not (cfg.PH_IDEAL_MINIMO < ph < cfg.PH_IDEAL_MAXIMO):
             justificativa = f"Umidade baixa ({umidade}%), mas pH ({ph}) fora do ideal."
         else:
             decisao, justificativa = "Ligar bomba", f"Umidade ({umidade}%) ideal para irrigar."
-    elif umidade > params['UMIDADE_ALTA_PARAR_IRRIGACAO']:
+    elif umidade > cfg.UMIDADE_ALTA_PARAR_IRRIGACAO:
         justificativa = f"Umidade ({umidade}%) acima do necessário."
 
     return {'decisao': decisao, 'justificativa': justificativa, 'emergencia': emergencia}
 
+# --- Lógica do ESP32 em grade (superfície de decisão) ---
+# Códigos de decisão; os textos só são montados na borda, via lookup
+MOTIVOS_LOGICA = np.array([
+    "Condições normais",
+    "EMERGÊNCIA: umidade crítica",
+    "EMERGÊNCIA: pH crítico",
+    "Umidade baixa, pH fora do ideal",
+    "Umidade baixa: ligar bomba",
+    "Umidade alta",
+])
+BOMBA_POR_CODIGO = np.array([False, True, True, False, True, False])
+
+def _codigos_logica_numpy(umid, ph, crit, umin, ualta, ph_ideal_min, ph_ideal_max, ph_crit_min, ph_crit_max):
+    ph_crit = ~((ph > ph_crit_min) & (ph < ph_crit_max))
+    baixa = umid < umin
+    ph_ideal = (ph > ph_ideal_min) & (ph < ph_ideal_max)
+    return np.select(
+        [umid < crit, ph_crit, baixa & ~ph_ideal, baixa, umid > ualta],
+        [1, 2, 3, 4, 5], default=0,
+    ).astype(np.int8)
+
+if njit is not None:
+    @njit(cache=True)
+    def _codigos_logica(umid, ph, crit, umin, ualta, ph_ideal_min, ph_ideal_max, ph_crit_min, ph_crit_max):
+        codigos = np.zeros(umid.shape[0], dtype=np.int8)
+        for i in range(umid.shape[0]):
+            u, p = umid[i], ph[i]
+            if u < crit:
+                codigos[i] = 1
+            elif not (ph_crit_min < p < ph_crit_max):
+                codigos[i] = 2
+            elif u < umin:
+                codigos[i] = 4 if ph_ideal_min < p < ph_ideal_max else 3
+            elif u > ualta:
+                codigos[i] = 5
+        return codigos
+else:
+    _codigos_logica = _codigos_logica_numpy
+
+def simular_logica_irrigacao_grade(umidade, ph, cfg: LogicaCfg) -> np.ndarray:
+    """Aplica simular_logica_irrigacao a arrays (mesmo formato) de umidade e pH.
+
+    Retorna códigos int8 (índices de MOTIVOS_LOGICA / BOMBA_POR_CODIGO).
+    """
+    umidade, ph = np.broadcast_arrays(np.asarray(umidade, dtype=np.float64), np.asarray(ph, dtype=np.float64))
+    codigos = _codigos_logica(
+        np.ascontiguousarray(umidade.ravel()), np.ascontiguousarray(ph.ravel()),
+        cfg.UMIDADE_CRITICA_BAIXA, cfg.UMIDADE_MINIMA_PARA_IRRIGAR, cfg.UMIDADE_ALTA_PARAR_IRRIGACAO,
+        cfg.PH_IDEAL_MINIMO, cfg.PH_IDEAL_MAXIMO, cfg.PH_CRITICO_MINIMO, cfg.PH_CRITICO_MAXIMO,
+    )
+    return codigos.reshape(umidade.shape)
+
 # --- Análise do Histórico de Decisões ---
 def analisar_historico_decisoes(df: pd.DataFrame) -> dict:
     if df.empty or 'decisao_logica_esp32' not in df.columns:
         return {'total_emergencias': 0, 'ph_criticos': 0, 'decisao_mais_comum': None}
     
     decisoes = df['decisao_logica_esp32'].fillna('').astype(str)
-    total_emergencias = int(decisoes.str.contains('EMERGENCIA', case=False).sum())
-    ph_criticos = int(decisoes.str.contains('pH critico', case=False).sum())
+    # Busca de substring literal (sem regex) sobre a coluna já em maiúsculas
+    decisoes_upper = decisoes.str.upper()
+    total_emergencias = int(decisoes_upper.str.contains('EMERGENCIA', regex=False).sum())
+    ph_criticos = int(decisoes_upper.str.contains('PH CRITICO', regex=False).sum())
     mais_comum = decisoes.value_counts().idxmax() if not decisoes.empty else None
     
-    return {'total_emergencias': total_emergencias, 'ph_criticos': ph_criticos, 'decisao_mais_comum': mais_comum}
+    return {'total_emergencias': total_emergencias, 'ph_criticos': ph_criticos, 'decisao_mais_comum': mais_comum}
@@ -13,6 +13,7 @@ unitários) e facilitar a manutenção.
 """
 
 import datetime as _dt
+import operator
 from contextlib import contextmanager
 from typing import List, Optional, Iterable
 
@@ -22,10 +23,17 @@ from sqlalchemy import (
     Integer,
     Float,
     Boolean,
+    Index,
     DateTime,
     String,
+    delete,
+    event,
+    func,
+    select,
 )
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import declarative_base, sessionmaker, Session
+from sqlalchemy.pool import QueuePool, StaticPool
 
 # ---------------------------------------------------------------------------
 # Configurações básicas
@@ -71,18 +79,23 @@ class LeituraSensor(Base):
     # Métodos utilitários
     # ---------------------------------------------------------------------
     def to_dict(self) -> dict:
-        return {
-            "id": self.id,
-            "timestamp": self.timestamp.isoformat(),
-            "umidade": self.umidade,
-            "ph_estimado": self.ph_estimado,
-            "fosforo_presente": self.fosforo_presente,
-            "potassio_presente": self.potassio_presente,
-            "temperatura": self.temperatura,
-            "bomba_ligada": self.bomba_ligada,
-            "decisao_logica_esp32": self.decisao_logica_esp32,
-            "emergencia": self.emergencia,
-        }
+        d = dict(zip(_CAMPOS_LEITURA, _GET_CAMPOS(self)))
+        d["timestamp"] = d["timestamp"].isoformat()
+        return d
+
+
+# Campos serializados de LeituraSensor, lidos de uma vez por um único attrgetter
+_CAMPOS_LEITURA = (
+    "id", "timestamp", "umidade", "ph_estimado", "fosforo_presente",
+    "potassio_presente", "temperatura", "bomba_ligada",
+    "decisao_logica_esp32", "emergencia",
+)
+_GET_CAMPOS = operator.attrgetter(*_CAMPOS_LEITURA)
+
+
+# Índice descendente: ORDER BY timestamp DESC LIMIT n vira uma varredura do
+# índice, sem ordenar a tabela inteira
+_IX_TS_DESC = Index("ix_leituras_ts_desc", LeituraSensor.timestamp.desc())
 
 
 # ---------------------------------------------------------------------------
@@ -120,17 +133,44 @@ def init_db(db_url: str | None = None):
     # Senão, use a URL global.
     url_to_use = db_url if db_url else DATABASE_URL
 
+    # Engine único por processo: dashboard e listener compartilham o mesmo pool
+    if _ENGINE is not None and _ENGINE.url == make_url(url_to_use):
+        return _ENGINE
+
+    # SQLite em memória só existe dentro de uma conexão: StaticPool a compartilha.
+    # Arquivos usam um pool de conexões reaproveitadas entre requisições.
+    if make_url(url_to_use).database in (None, "", ":memory:"):
+        pool_kwargs = {"poolclass": StaticPool}
+    else:
+        pool_kwargs = {"poolclass": QueuePool, "pool_size": 5, "max_overflow": 10, "pool_pre_ping": False}
+
     # Usa connect_args para ser compatível com SQLite em ambiente multithread
-    _ENGINE = create_engine(url_to_use, connect_args={"check_same_thread": False})
+    _ENGINE = create_engine(url_to_use, connect_args={"check_same_thread": False}, **pool_kwargs)
+    if _ENGINE.dialect.name == "sqlite":
+        event.listen(_ENGINE, "connect", _configurar_sqlite)
     
     # Inicializa o SessionLocal com o engine configurado
     _SessionLocal = sessionmaker(bind=_ENGINE, autocommit=False, autoflush=False)
     
     # Cria as tabelas que não existem
     Base.metadata.create_all(bind=_ENGINE)
+    # create_all pula tabelas já existentes junto com os índices delas: bancos
+    # criados antes do índice descendente o recebem aqui
+    _IX_TS_DESC.create(bind=_ENGINE, checkfirst=True)
     
     return _ENGINE
 
+def _configurar_sqlite(dbapi_conn, _connection_record) -> None:
+    """Ajusta cada nova conexão SQLite: WAL permite leituras durante escritas,
+    synchronous=NORMAL evita um fsync por commit, tabelas temporárias ficam
+    em memória e o arquivo é lido via mmap (até 256 MiB)."""
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.close()
+
 def get_engine():
     """Retorna a instância global do engine. Garante que init_db foi chamado."""
     if _ENGINE is None:
@@ -147,6 +187,16 @@ def add_leitura(leitura: LeituraSensor, db_session) -> LeituraSensor:
     return leitura
 
 
+def add_leituras_bulk(rows: Iterable[dict]) -> int:
+    """Insere várias leituras em uma única transação. Retorna quantas foram gravadas."""
+    leituras = [LeituraSensor(**r) for r in rows]
+    if not leituras:
+        return 0
+    with session_scope() as s:
+        s.bulk_save_objects(leituras, return_defaults=False)
+    return len(leituras)
+
+
 def get_ultimas_leituras(db_session, limit: int = 100) -> list[LeituraSensor]:
     """Retorna as `limit` últimas leituras, ordenadas da mais recente."""
     return (
@@ -157,11 +207,44 @@ def get_ultimas_leituras(db_session, limit: int = 100) -> list[LeituraSensor]:
     )
 
 
+def get_ultimas_leituras_raw(db_session, limit: int = 100) -> list:
+    """Como get_ultimas_leituras, mas via Core: devolve tuplas de linha (na ordem
+    de LeituraSensor.__table__.columns) sem hidratar objetos ORM."""
+    tabela = LeituraSensor.__table__
+    return db_session.execute(
+        select(tabela).order_by(tabela.c.timestamp.desc()).limit(limit)
+    ).all()
+
+
+def get_colunas_leituras(db_session, colunas, limit: int = 2000) -> list:
+    """Retorna apenas *colunas* das `limit` leituras mais recentes (tuplas)."""
+    tabela = LeituraSensor.__table__
+    return db_session.execute(
+        select(*(tabela.c[c] for c in colunas))
+        .order_by(tabela.c.timestamp.desc())
+        .limit(limit)
+    ).all()
+
+
+def get_pagina_leituras(db_session, offset: int = 0, limit: int = 50) -> list:
+    """Retorna uma página de leituras (tuplas), da mais recente para a mais antiga."""
+    tabela = LeituraSensor.__table__
+    return db_session.execute(
+        select(tabela).order_by(tabela.c.timestamp.desc()).offset(offset).limit(limit)
+    ).all()
+
+
+def contar_leituras(db_session) -> int:
+    """Total de leituras gravadas."""
+    return db_session.execute(select(func.count()).select_from(LeituraSensor.__table__)).scalar_one()
+
+
 def delete_leitura_por_id(leitura_id: int) -> bool:
     """Remove uma leitura pelo ID. Retorna True se algo foi apagado."""
     with session_scope() as s:
-        deleted = s.query(LeituraSensor).filter_by(id=leitura_id).delete()
-        return bool(deleted)
+        # DELETE direto (Core): sem SELECT prévio nem identity map do ORM
+        res = s.execute(delete(LeituraSensor).where(LeituraSensor.id == leitura_id))
+        return res.rowcount > 0
 
 
 # ---------------------------------------------------------------------------
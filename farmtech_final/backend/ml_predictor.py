@@ -5,20 +5,92 @@ irrigação e forecasting de séries temporais.
 
 from __future__ import annotations
 
+import functools
+import hashlib
+import inspect
+import os
+
+import joblib
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split, GridSearchCV
+from sklearn.ensemble import HistGradientBoostingClassifier
+from sklearn.model_selection import train_test_split, GridSearchCV, StratifiedShuffleSplit
 from sklearn.metrics import accuracy_score, confusion_matrix
-from statsmodels.tsa.arima.model import ARIMA
-from statsmodels.tools.sm_exceptions import ConvergenceWarning
 import warnings
 
-# Ignorar avisos de convergência do ARIMA que não são críticos
-warnings.filterwarnings("ignore", category=ConvergenceWarning)
 warnings.filterwarnings("ignore", category=UserWarning, module='statsmodels')
 
 
+@functools.lru_cache(maxsize=None)
+def _arima_cls():
+    """Importa o ARIMA do statsmodels apenas no primeiro forecast."""
+    from statsmodels.tsa.arima.model import ARIMA
+    from statsmodels.tools.sm_exceptions import ConvergenceWarning
+
+    # Ignorar avisos de convergência do ARIMA que não são críticos
+    warnings.filterwarnings("ignore", category=ConvergenceWarning)
+    return ARIMA
+
+# Modelos treinados ficam em disco, indexados pelo hash dos dados de entrada
+MODELS_DIR = os.path.join(os.path.dirname(__file__), "data", "models")
+
+
+# ---------------------------------------------------------------------------
+# Cache de modelos em disco
+# ---------------------------------------------------------------------------
+
+def _hash_dados(dados: pd.DataFrame | pd.Series, *extras) -> str:
+    """Hash estável do conteúdo (valores, índice e colunas) e dos parâmetros."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(pd.util.hash_pandas_object(dados, index=True).to_numpy().tobytes())
+    colunas = dados.columns.tolist() if isinstance(dados, pd.DataFrame) else [dados.name]
+    h.update(repr((colunas, extras)).encode())
+    return h.hexdigest()
+
+
+def _remover_artefatos(nome: str) -> None:
+    if not os.path.isdir(MODELS_DIR):
+        return
+    for antigo in os.listdir(MODELS_DIR):
+        if antigo.startswith(f"{nome}_") and antigo.endswith(".joblib"):
+            os.remove(os.path.join(MODELS_DIR, antigo))
+
+
+def cache_to_disk(func):
+    """Reaproveita o resultado de *func* salvo em MODELS_DIR quando os dados e
+    parâmetros são os mesmos; só o artefato mais recente de cada função é mantido.
+
+    ``func.clear()`` apaga o artefato salvo, forçando um novo treino.
+    """
+    assinatura = inspect.signature(func)
+    param_dados = next(iter(assinatura.parameters))
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # Chave pelos argumentos normalizados: posicional, nomeado ou default dão o mesmo hash
+        ligados = assinatura.bind(*args, **kwargs)
+        ligados.apply_defaults()
+        params = dict(ligados.arguments)
+        dados = params.pop(param_dados)
+        chave = _hash_dados(dados, sorted(params.items()))
+        path = os.path.join(MODELS_DIR, f"{func.__name__}_{chave}.joblib")
+        if os.path.exists(path):
+            try:
+                # Sem mmap: o modelo carregado precisa de arrays graváveis para novo ajuste
+                return joblib.load(path)
+            except Exception:
+                pass  # Artefato corrompido ou incompatível: treina novamente
+
+        resultado = func(*args, **kwargs)
+
+        os.makedirs(MODELS_DIR, exist_ok=True)
+        _remover_artefatos(func.__name__)
+        joblib.dump(resultado, path, compress=0)
+        return resultado
+    wrapper.clear = functools.partial(_remover_artefatos, func.__name__)
+    return wrapper
+
+
 # ---------------------------------------------------------------------------
 # Feature Engineering helpers
 # ---------------------------------------------------------------------------
@@ -34,10 +106,24 @@ def add_time_based_features(df: pd.DataFrame, timestamp_col: str = "timestamp")
     return df
 
 
+def _rolling_mean(a: np.ndarray, window: int) -> np.ndarray:
+    """Média móvel via somas acumuladas, equivalente a rolling(min_periods=1).mean().
+
+    Valores NaN são ignorados, como no pandas; janelas só com NaN resultam em NaN.
+    """
+    valid = ~np.isnan(a)
+    soma = np.cumsum(np.where(valid, a, 0.0))
+    cont = np.cumsum(valid, dtype=np.int64)
+    soma[window:] -= soma[:-window].copy()
+    cont[window:] -= cont[:-window].copy()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(cont > 0, soma / cont, np.nan)
+
+
 def add_moving_average(df: pd.DataFrame, col: str, window: int = 3) -> pd.DataFrame:
     """Cria a média móvel de *col* nas últimas *window* leituras."""
     df = df.copy()
-    df[f"{col}_ma{window}"] = df[col].rolling(window=window, min_periods=1).mean()
+    df[f"{col}_ma{window}"] = _rolling_mean(df[col].to_numpy(dtype=np.float64), window)
     return df
 
 
@@ -66,7 +152,8 @@ def build_feature_matrix(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.Series]:
         if col not in df_f.columns:
             df_f[col] = 0
 
-    X = df_f[feature_cols].fillna(method="ffill").fillna(0)
+    X = df_f[feature_cols].ffill()
+    X.fillna(0, inplace=True)
     y = df_f["emergencia"].astype(int)
     return X, y
 
@@ -75,21 +162,22 @@ def build_feature_matrix(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.Series]:
 # Model Training - Risco de Emergência
 # ---------------------------------------------------------------------------
 
+@cache_to_disk
 def train_risk_model(
     df: pd.DataFrame,
     param_grid: dict | None = None,
     test_size: float = 0.3,
     random_state: int = 42,
 ):
-    """Realiza treino/validação de um RandomForest para risco de emergência."""
+    """Realiza treino/validação de um HistGradientBoosting para risco de emergência."""
     if df.empty or 'emergencia' not in df.columns:
         raise ValueError("DataFrame para treino de risco deve ser válido e conter a coluna 'emergencia'.")
 
     if param_grid is None:
         param_grid = {
-            "n_estimators": [50, 100, 200],
-            "max_depth": [5, 10, None],
-            "min_samples_leaf": [2, 4],
+            "learning_rate": [0.05, 0.1],
+            "max_depth": [3, 6, None],
+            "max_iter": [100, 200],
         }
 
     X, y = build_feature_matrix(df)
@@ -101,13 +189,16 @@ def train_risk_model(
         X, y, test_size=test_size, random_state=random_state, stratify=y
     )
 
+    # Paralelismo só no nível da busca (o backend padrão do joblib já é o loky)
     grid = GridSearchCV(
-        RandomForestClassifier(random_state=random_state, class_weight='balanced'),
-        param_grid=param_grid, cv=3, n_jobs=-1, scoring="accuracy"
+        HistGradientBoostingClassifier(class_weight="balanced", random_state=random_state),
+        param_grid=param_grid,
+        cv=StratifiedShuffleSplit(n_splits=3, test_size=1 / 3, random_state=random_state),
+        n_jobs=-1, pre_dispatch="2*n_jobs", scoring="accuracy"
     )
     grid.fit(X_train, y_train)
 
-    best_model: RandomForestClassifier = grid.best_estimator_
+    best_model: HistGradientBoostingClassifier = grid.best_estimator_
     y_pred = best_model.predict(X_test)
     acc = accuracy_score(y_test, y_pred)
     cm = confusion_matrix(y_test, y_pred)
@@ -122,8 +213,13 @@ def train_risk_model(
 # Model Training - Forecast de Umidade (ARIMA)
 # ---------------------------------------------------------------------------
 
-def train_arima_model(series: pd.Series, order=(5,1,0)):
-    """Treina um modelo ARIMA em uma série temporal e retorna o modelo treinado."""
+@cache_to_disk
+def train_arima_model(series: pd.Series, order=(5,1,0), freq_minutes: int | None = None):
+    """Treina um modelo ARIMA em uma série temporal e retorna o modelo treinado.
+
+    Com *freq_minutes* (intervalo conhecido entre leituras), a frequência é
+    anexada ao índice sem inferência; só séries irregulares são reindexadas.
+    """
     if not isinstance(series, pd.Series) or series.empty:
         raise ValueError("A entrada deve ser uma pandas Series não vazia.")
 
@@ -131,23 +227,41 @@ def train_arima_model(series: pd.Series, order=(5,1,0)):
         raise ValueError(f"Série temporal muito curta ({len(series)} pontos). São necessários pelo menos 20 pontos para o forecast.")
 
     # Garante que a série tenha frequência, se possível
-    if series.index.inferred_freq is None:
-        series = series.asfreq(pd.infer_freq(series.index), method='ffill')
+    if freq_minutes:
+        offset = pd.tseries.frequencies.to_offset(f"{freq_minutes}min")
+        try:
+            series = series.set_axis(pd.DatetimeIndex(series.index, freq=offset))
+        except ValueError:  # Leituras irregulares: reamostra na grade do intervalo
+            series = series.asfreq(offset, method='ffill')
+    elif getattr(series.index, "freq", None) is None:
+        freq = series.index.inferred_freq
+        if freq is not None:
+            series = series.set_axis(pd.DatetimeIndex(series.index, freq=freq))
 
     try:
-        model = ARIMA(series.astype(float), order=order)
+        model = _arima_cls()(series.astype(float), order=order)
         model_fit = model.fit()
         return model_fit
     except Exception as e:
         raise RuntimeError(f"Falha ao treinar modelo ARIMA: {e}")
 
 
+def forecast_arima(model_fit, steps: int = 24) -> pd.DataFrame:
+    """Previsão (média e intervalos de confiança) a partir de um ARIMA já ajustado.
+
+    Separada do treino para que o modelo possa ficar em cache: só esta etapa,
+    que é barata, roda a cada interação.
+    """
+    return model_fit.get_forecast(steps=steps).summary_frame()
+
+
 # ---------------------------------------------------------------------------
 # Model Training - Previsão de Manutenção da Bomba
 # ---------------------------------------------------------------------------
 
+@cache_to_disk
 def train_maintenance_model(df: pd.DataFrame):
-    """Treina um RandomForest para prever necessidade de manutenção da bomba."""
+    """Treina um HistGradientBoosting para prever necessidade de manutenção da bomba."""
     if df.empty or 'bomba_ligada' not in df.columns:
         raise ValueError("DataFrame deve conter as colunas 'timestamp' e 'bomba_ligada'.")
         
@@ -177,7 +291,7 @@ def train_maintenance_model(df: pd.DataFrame):
 
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.25, random_state=42, stratify=y)
     
-    clf = RandomForestClassifier(n_estimators=100, random_state=42, class_weight='balanced')
+    clf = HistGradientBoostingClassifier(max_iter=100, class_weight="balanced", random_state=42)
     clf.fit(X_train, y_train)
 
     acc = accuracy_score(y_test, clf.predict(X_test))
@@ -4,31 +4,42 @@ Geração de relatórios em PDF sobre o estado do sistema.
 
 from __future__ import annotations
 
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict
 
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib.pagesizes import A4
-from rich.console import Console as RichConsole
+# reportlab, rich e o módulo legado são importados só quando um relatório é
+# de fato gerado, para não pesar na inicialização do ERP
 
-try:
-    from gerenciador_dados import gerar_relatorio_farmtech_pdf_phd as _legacy_pdf
-except ImportError:
-    _legacy_pdf = None
 
+@lru_cache(maxsize=None)
+def _legacy_pdf():
+    """Função de PDF detalhado do gerenciador_dados legado, ou None se ausente."""
+    try:
+        from gerenciador_dados import gerar_relatorio_farmtech_pdf_phd
+    except ImportError:
+        return None
+    return gerar_relatorio_farmtech_pdf_phd
 
-STYLE = getSampleStyleSheet()["BodyText"]
+
+@lru_cache(maxsize=None)
+def _estilo():
+    from reportlab.lib.styles import getSampleStyleSheet
+
+    return getSampleStyleSheet()["BodyText"]
 
 
 def gerar_relatorio_pdf(resumo_info: Dict[str, str], destino: str | Path = "relatorio_farmtech.pdf") -> Path:
     """Cria um PDF simples contendo as chaves/valores de *resumo_info*."""
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+    from reportlab.lib.pagesizes import A4
 
     doc = SimpleDocTemplate(str(destino), pagesize=A4)
     story = []
+    estilo = _estilo()
 
     for k, v in resumo_info.items():
-        story.append(Paragraph(f"<b>{k}:</b> {v}", STYLE))
+        story.append(Paragraph(f"<b>{k}:</b> {v}", estilo))
         story.append(Spacer(1, 12))
 
     doc.build(story)
@@ -37,10 +48,13 @@ def gerar_relatorio_pdf(resumo_info: Dict[str, str], destino: str | Path = "rela
 
 def gerar_relatorio_farmtech_pdf_detalhado(df_historico, cache_analises: dict, modelo_ml=None):
     """Envia para a função legado se disponível, garantindo compatibilidade."""
-    if _legacy_pdf is None:
+    legacy_pdf = _legacy_pdf()
+    if legacy_pdf is None:
         raise RuntimeError("Função PDF detalhada não disponível (módulo gerenciador_dados não encontrado).")
 
-    return _legacy_pdf(
+    from rich.console import Console as RichConsole
+
+    return legacy_pdf(
         df_historico,
         cache_analises.get("stats"),
         cache_analises.get("correl"),
@@ -36,13 +36,7 @@ def update_leitura(leitura_id: int, campos: Dict[str, Any]) -> bool:
         return True
 
 def delete_leitura(leitura_id: int) -> bool:
-    with db_manager.session_scope() as sess:
-        leitura = sess.get(LeituraSensor, leitura_id)
-        if not leitura:
-            return False
-        sess.delete(leitura)
-        sess.commit()
-        return True
+    return db_manager.delete_leitura_por_id(leitura_id)
 
 # --------------------- FUNÇÕES DE ANÁLISE ORQUESTRADA -----------------
 
@@ -59,12 +53,12 @@ def get_full_analysis(df):
 def run_what_if_simulation(umidade: float, ph: float, temperatura: float = 25.0,
                             fosforo: bool = True, potassio: bool = True):
     """Wrapper de simulação de lógica de irrigação (what-if)."""
-    cfg = config_manager.get_config()['logica_esp32']
+    cfg = config_manager.get_logica_cfg()
     
-    if umidade < cfg['UMIDADE_MINIMA_PARA_IRRIGAR']:
-        return True, f"Ligar: Umidade ({umidade}%) abaixo do mínimo ({cfg['UMIDADE_MINIMA_PARA_IRRIGAR']}%)"
+    if umidade < cfg.UMIDADE_MINIMA_PARA_IRRIGAR:
+        return True, f"Ligar: Umidade ({umidade}%) abaixo do mínimo ({cfg.UMIDADE_MINIMA_PARA_IRRIGAR}%)"
         
-    if umidade > cfg['UMIDADE_ALTA_PARAR_IRRIGACAO']:
-        return False, f"Desligar: Umidade ({umidade}%) acima do ideal ({cfg['UMIDADE_ALTA_PARAR_IRRIGACAO']}%)"
+    if umidade > cfg.UMIDADE_ALTA_PARAR_IRRIGACAO:
+        return False, f"Desligar: Umidade ({umidade}%) acima do ideal ({cfg.UMIDADE_ALTA_PARAR_IRRIGACAO}%)"
 
     return False, f"Manter desligada: Umidade ({umidade}%) está dentro da faixa ideal." 
\ No newline at end of file
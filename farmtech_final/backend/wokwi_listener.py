@@ -8,14 +8,25 @@ Este módulo simula a captura de dados do simulador Wokwi
 e os persiste no banco de dados para visualização no dashboard.
 """
 
+import asyncio
 import json
 import time
-import random
 import logging
-from datetime import datetime
+from collections import deque
+from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 import signal
 import sys
+import threading
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.exc import OperationalError
+
+try:
+    import websockets
+except ImportError:  # Sem o pacote, o listener só grava no banco (dashboard por polling)
+    websockets = None
 
 # Configuração de logging
 logging.basicConfig(
@@ -24,15 +35,17 @@ logging.basicConfig(
 )
 logger = logging.getLogger("WokwiListener")
 
+# Gerador único (PCG64) para as leituras simuladas, escalares ou em lote
+_RNG = np.random.default_rng()
+
 # Imports do sistema FarmTech
 try:
-    from . import services, db_manager
-    from .config_manager import get_config
+    from . import db_manager
+    from .config_manager import get_config, get_logica_cfg
 except ImportError:
     # Para execução direta
-    import services
     import db_manager
-    from config_manager import get_config
+    from config_manager import get_config, get_logica_cfg
 
 class WokwiListener:
     """
@@ -50,7 +63,7 @@ class WokwiListener:
             db_manager.init_db()
             logger.info("Banco de dados inicializado com sucesso")
         except Exception as e:
-            logger.error(f"Erro ao inicializar banco de dados: {e}")
+            logger.error("Erro ao inicializar banco de dados: %s", e)
             raise
         
         # Configurar handler para interrupção
@@ -67,14 +80,37 @@ class WokwiListener:
             'PH_CRITICO_MINIMO': 4.5,
             'PH_CRITICO_MAXIMO': 7.5,
         })
+        # Limiares como atributos (sem buscas em dict por leitura)
+        self._th = get_logica_cfg({'logica_esp32': self.params})
+        
+        # Buffer de escrita: leituras acumuladas e gravadas em lote
+        forecast_settings = self.config.get('forecast_settings', {})
+        self._buffer_max = int(forecast_settings.get('batch_size', 500))
+        # Limitado: com o banco fora do ar por muito tempo, as leituras mais antigas
+        # são descartadas (com aviso no log) em vez de a memória crescer sem fim
+        self._buffer: deque = deque(maxlen=self._buffer_max * 10)
+        self._descartadas = 0
+        self._flush_interval_s = float(forecast_settings.get('flush_interval_s', 30.0))
+        self._last_flush = time.monotonic()
+        
+        # Intervalo entre leituras (mínimo de 5 segundos para simulação),
+        # calculado uma vez; o evento acorda o laço imediatamente no stop()
+        self._interval = max(5.0, forecast_settings.get('intervalo_leitura_minutos', 0.1) * 60)
+        self._stop_event = threading.Event()
+        
+        # Push em tempo real: cada leitura aceita é difundida aos clientes WebSocket
+        self._stream_cfg = self.config.get('stream_settings', {})
+        self._ws_clients: set = set()
+        self._ws_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ws_parar: Optional[asyncio.Event] = None
         
         logger.info("WokwiListener inicializado")
     
     def _signal_handler(self, signum, frame):
-        """Handler para sinais de interrupção"""
-        logger.info(f"Recebido sinal {signum}, parando listener...")
-        self.stop()
-        sys.exit(0)
+        """Handler para sinais de interrupção: só sinaliza; o laço grava e para no finally"""
+        logger.info("Recebido sinal %s, parando listener...", signum)
+        self.running = False
+        self._stop_event.set()
     
     def simulate_wokwi_data(self) -> Dict[str, Any]:
         """
@@ -88,13 +124,13 @@ class WokwiListener:
         base_temp = 25.0
         
         # Adiciona variação aleatória mas realística
-        humidity = max(0, min(100, base_humidity + random.uniform(-10, 15)))
-        ph = max(0, min(14, base_ph + random.uniform(-1, 1)))
-        temperature = max(0, min(50, base_temp + random.uniform(-5, 10)))
+        humidity = max(0, min(100, base_humidity + _RNG.uniform(-10, 15)))
+        ph = max(0, min(14, base_ph + _RNG.uniform(-1, 1)))
+        temperature = max(0, min(50, base_temp + _RNG.uniform(-5, 10)))
         
         # Simula presença de nutrientes (ocasionalmente False)
-        phosphorus = random.random() > 0.1  # 90% chance de estar presente
-        potassium = random.random() > 0.1   # 90% chance de estar presente
+        phosphorus = bool(_RNG.random() > 0.1)  # 90% chance de estar presente
+        potassium = bool(_RNG.random() > 0.1)   # 90% chance de estar presente
         
         # Simula lógica de decisão da bomba
         pump_on, decision_reason = self._simulate_irrigation_logic(
@@ -102,14 +138,11 @@ class WokwiListener:
         )
         
         # Detecta emergência
-        emergency = (
-            humidity < self.params['UMIDADE_CRITICA_BAIXA'] or
-            ph < self.params['PH_CRITICO_MINIMO'] or
-            ph > self.params['PH_CRITICO_MAXIMO']
-        )
+        th = self._th
+        emergency = bool(humidity < th.UMIDADE_CRITICA_BAIXA or ph < th.PH_CRITICO_MINIMO or ph > th.PH_CRITICO_MAXIMO)
         
         return {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": datetime.now(),
             "umidade": round(humidity, 1),
             "ph_estimado": round(ph, 1),
             "fosforo_presente": phosphorus,
@@ -120,6 +153,86 @@ class WokwiListener:
             "emergencia": emergency
         }
     
+    def simulate_batch(self, n: int) -> pd.DataFrame:
+        """
+        Gera *n* leituras de uma vez (backfill / testes de carga), com a mesma
+        distribuição e lógica de decisão de simulate_wokwi_data, usando
+        máscaras NumPy em vez de um laço por amostra
+        Timestamps espaçados pelo intervalo de leitura, terminando agora
+        """
+        rng = _RNG
+        humidity = np.clip(30.0 + rng.uniform(-10, 15, n), 0, 100)
+        ph = np.clip(6.5 + rng.uniform(-1, 1, n), 0, 14)
+        temperature = np.clip(25.0 + rng.uniform(-5, 10, n), 0, 50)
+        phosphorus = rng.random(n) > 0.1
+        potassium = rng.random(n) > 0.1
+        pump_on, reason, emergency = self._decidir_lote(humidity, ph, phosphorus, potassium)
+        
+        now = datetime.now()
+        timestamps = pd.date_range(end=now, periods=n, freq=timedelta(seconds=self._interval))
+        
+        return pd.DataFrame({
+            "timestamp": timestamps,
+            "umidade": humidity.round(1),
+            "ph_estimado": ph.round(1),
+            "fosforo_presente": phosphorus,
+            "potassio_presente": potassium,
+            "temperatura": temperature.round(1),
+            "bomba_ligada": pump_on,
+            "decisao_logica_esp32": reason,
+            "emergencia": emergency,
+        })
+    
+    def _decidir_lote(self, humidity: np.ndarray, ph: np.ndarray,
+                      phosphorus: np.ndarray, potassium: np.ndarray):
+        """
+        Versão vetorizada de _simulate_irrigation_logic
+        Retorna (bomba_ligada, motivo, emergencia), um elemento por leitura
+        """
+        th = self._th
+        crit_low = humidity < th.UMIDADE_CRITICA_BAIXA
+        ph_crit = (ph < th.PH_CRITICO_MINIMO) | (ph > th.PH_CRITICO_MAXIMO)
+        low = humidity < th.UMIDADE_MINIMA_PARA_IRRIGAR
+        ph_ideal = (ph >= th.PH_IDEAL_MINIMO) & (ph <= th.PH_IDEAL_MAXIMO)
+        high = humidity > th.UMIDADE_ALTA_PARAR_IRRIGACAO
+        
+        # Mesma ordem de prioridade de _simulate_irrigation_logic
+        pump_on = np.select([crit_low, ph_crit, low], [True, False, ph_ideal], default=False)
+        
+        h = pd.Series(np.char.mod('%.1f', humidity))
+        p = pd.Series(np.char.mod('%.1f', ph))
+        nutrients = pd.Series(np.select(
+            [phosphorus & potassium, phosphorus | potassium],
+            ["nutrientes OK", "nutrientes parciais"], default="sem nutrientes"
+        ))
+        reason = np.select(
+            [crit_low, ph_crit, low & ph_ideal, low, high],
+            [
+                ("EMERGÊNCIA: Umidade crítica (" + h + "%)").to_numpy(),
+                ("pH crítico (" + p + ") - Irrigação bloqueada").to_numpy(),
+                ("Umidade baixa (" + h + "%), pH ideal, " + nutrients).to_numpy(),
+                ("Umidade baixa (" + h + "%), mas pH não ideal (" + p + ")").to_numpy(),
+                ("Umidade alta (" + h + "%) - Irrigação desnecessária").to_numpy(),
+            ],
+            default=("Condições normais - Bomba desligada (Umidade: " + h + "%)").to_numpy(),
+        )
+        return pump_on, reason, crit_low | ph_crit
+    
+    def persist_batch(self, df: pd.DataFrame) -> int:
+        """Grava imediatamente um lote (ex.: saída de simulate_batch) junto com o buffer"""
+        self._enfileirar(df.to_dict('records'))
+        return self.flush()
+
+    def _enfileirar(self, leituras: list) -> None:
+        """Acrescenta leituras ao buffer, registrando as que saem por ele estar cheio"""
+        excedentes = len(self._buffer) + len(leituras) - self._buffer.maxlen
+        if excedentes > 0:
+            self._descartadas += excedentes
+            logger.warning("Buffer cheio (%d leituras pendentes): %d leituras mais antigas "
+                           "descartadas, %d no total", self._buffer.maxlen, excedentes,
+                           self._descartadas)
+        self._buffer.extend(leituras)
+    
     def _simulate_irrigation_logic(self, humidity: float, ph: float, 
                                   phosphorus: bool, potassium: bool, 
                                   temperature: float) -> tuple[bool, str]:
@@ -127,19 +240,19 @@ class WokwiListener:
         Simula a lógica de irrigação do ESP32
         Retorna (deve_ligar_bomba, motivo)
         """
-        params = self.params
+        th = self._th
         
         # Lógica de emergência
-        if humidity < params['UMIDADE_CRITICA_BAIXA']:
+        if humidity < th.UMIDADE_CRITICA_BAIXA:
             return True, f"EMERGÊNCIA: Umidade crítica ({humidity:.1f}%)"
         
         # Lógica de pH crítico
-        if ph < params['PH_CRITICO_MINIMO'] or ph > params['PH_CRITICO_MAXIMO']:
+        if ph < th.PH_CRITICO_MINIMO or ph > th.PH_CRITICO_MAXIMO:
             return False, f"pH crítico ({ph:.1f}) - Irrigação bloqueada"
         
         # Lógica normal de irrigação
-        if humidity < params['UMIDADE_MINIMA_PARA_IRRIGAR']:
-            if params['PH_IDEAL_MINIMO'] <= ph <= params['PH_IDEAL_MAXIMO']:
+        if humidity < th.UMIDADE_MINIMA_PARA_IRRIGAR:
+            if th.PH_IDEAL_MINIMO <= ph <= th.PH_IDEAL_MAXIMO:
                 if phosphorus and potassium:
                     return True, f"Umidade baixa ({humidity:.1f}%), pH ideal, nutrientes OK"
                 elif phosphorus or potassium:
@@ -150,7 +263,7 @@ class WokwiListener:
                 return False, f"Umidade baixa ({humidity:.1f}%), mas pH não ideal ({ph:.1f})"
         
         # Umidade alta - parar irrigação
-        if humidity > params['UMIDADE_ALTA_PARAR_IRRIGACAO']:
+        if humidity > th.UMIDADE_ALTA_PARAR_IRRIGACAO:
             return False, f"Umidade alta ({humidity:.1f}%) - Irrigação desnecessária"
         
         # Condições normais
@@ -158,23 +271,115 @@ class WokwiListener:
     
     def persist_data(self, data: Dict[str, Any]) -> bool:
         """
-        Persiste os dados no banco de dados
+        Enfileira os dados para persistência; a gravação no banco acontece em
+        lote quando o buffer enche ou o intervalo de flush expira
         """
         try:
-            # Converte timestamp string para datetime se necessário
+            # Payloads da serial trazem o timestamp como texto ISO; o lote só aceita datetime
             if isinstance(data['timestamp'], str):
                 data['timestamp'] = datetime.fromisoformat(data['timestamp'].replace('Z', '+00:00'))
-            
-            # Usa o serviço para adicionar a leitura
-            leitura_id = services.add_leitura(**data)
-            
-            logger.info(f"Dados persistidos com sucesso - ID: {leitura_id}")
+            self._enfileirar([data])
+            self._publicar(data)
+            self._flush_if_needed()
             return True
             
         except Exception as e:
-            logger.error(f"Erro ao persistir dados: {e}")
+            logger.error("Erro ao persistir dados: %s", e)
             return False
     
+    def _flush_if_needed(self):
+        """Grava o buffer se atingiu o tamanho máximo ou o intervalo de flush"""
+        if (len(self._buffer) >= self._buffer_max or
+                time.monotonic() - self._last_flush >= self._flush_interval_s):
+            self.flush()
+    
+    def flush(self) -> int:
+        """
+        Grava todas as leituras pendentes em uma única transação
+        Retorna quantas foram gravadas. Se o banco estiver indisponível o buffer é
+        mantido; se o lote tiver linhas inválidas, elas são descartadas
+        """
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return 0
+        
+        rows = list(self._buffer)
+        try:
+            with db_manager.session_scope() as session:
+                session.bulk_insert_mappings(db_manager.LeituraSensor, rows)
+        except (OperationalError, RuntimeError) as e:
+            logger.error("Banco indisponível, lote de %d leituras mantido: %s", len(rows), e)
+            return 0
+        except Exception as e:
+            # Timestamp duplicado, tipo inválido...: uma linha ruim não pode travar as seguintes
+            logger.warning("Lote de %d leituras rejeitado (%s); gravando linha a linha", len(rows), e)
+            self._buffer.clear()
+            return self._gravar_linha_a_linha(rows)
+        
+        self._buffer.clear()
+        logger.info("Lote de %d leituras persistido com sucesso", len(rows))
+        return len(rows)
+    
+    def _gravar_linha_a_linha(self, rows) -> int:
+        """Grava cada leitura na própria transação; as que falham vão para o log (dead-letter)"""
+        gravadas = 0
+        for row in rows:
+            try:
+                with db_manager.session_scope() as session:
+                    session.bulk_insert_mappings(db_manager.LeituraSensor, [row])
+                gravadas += 1
+            except Exception as e:
+                logger.error("Leitura descartada: %s | %r", e, row)
+        logger.info("%d de %d leituras do lote persistidas", gravadas, len(rows))
+        return gravadas
+    
+    def _iniciar_stream(self):
+        """Sobe o servidor WebSocket em uma thread própria, se habilitado"""
+        if not self._stream_cfg.get('ws_ativo', False) or self._ws_loop is not None:
+            return
+        if websockets is None:
+            logger.warning("Pacote 'websockets' não instalado; push em tempo real desativado")
+            return
+        host = self._stream_cfg.get('ws_host', 'localhost')
+        port = int(self._stream_cfg.get('ws_port', 8765))
+        threading.Thread(target=asyncio.run, args=(self._servir_stream(host, port),),
+                         name="WokwiStream", daemon=True).start()
+    
+    async def _servir_stream(self, host: str, port: int):
+        self._ws_parar = asyncio.Event()
+        try:
+            async with websockets.serve(self._ws_handler, host, port):
+                self._ws_loop = asyncio.get_running_loop()
+                logger.info("Stream WebSocket em ws://%s:%d", host, port)
+                await self._ws_parar.wait()
+        except OSError as e:
+            logger.error("Erro ao iniciar stream WebSocket: %s", e)
+        finally:
+            self._ws_loop = None
+            self._ws_clients.clear()
+    
+    async def _ws_handler(self, ws, *_):
+        """Mantém o cliente registrado até a conexão fechar (nada é lido dele)"""
+        self._ws_clients.add(ws)
+        try:
+            await ws.wait_closed()
+        finally:
+            self._ws_clients.discard(ws)
+    
+    def _publicar(self, data: Dict[str, Any]):
+        """Envia a leitura a todos os clientes conectados, sem bloquear o laço de leitura"""
+        loop = self._ws_loop
+        if loop is None or not self._ws_clients:
+            return
+        mensagem = json.dumps(data, default=str, ensure_ascii=False)
+        # broadcast roda no loop do servidor, onde o conjunto de clientes é alterado
+        loop.call_soon_threadsafe(websockets.broadcast, self._ws_clients, mensagem)
+    
+    def _parar_stream(self):
+        loop = self._ws_loop
+        if loop is not None:
+            loop.call_soon_threadsafe(self._ws_parar.set)
+    
     def start(self):
         """Inicia o listener"""
         if self.running:
@@ -183,44 +388,52 @@ class WokwiListener:
         
         self.running = True
         self.simulation_active = True
+        self._stop_event.clear()
+        self._iniciar_stream()
         
         logger.info("Iniciando WokwiListener...")
         logger.info("Pressione Ctrl+C para parar")
         
         try:
+            deadline = time.monotonic()
             while self.running:
                 if self.simulation_active:
                     # Simula dados do Wokwi
                     data = self.simulate_wokwi_data()
                     
                     # Log dos dados
-                    logger.info(f"Dados simulados: Umidade={data['umidade']}%, "
-                              f"pH={data['ph_estimado']}, "
-                              f"Bomba={'ON' if data['bomba_ligada'] else 'OFF'}")
+                    # Formatação adiada: só acontece se o nível INFO estiver ativo
+                    logger.info("Dados simulados: Umidade=%.1f%%, pH=%.1f, Bomba=%s",
+                                data['umidade'], data['ph_estimado'],
+                                'ON' if data['bomba_ligada'] else 'OFF')
                     
                     # Persiste no banco
                     success = self.persist_data(data)
                     
                     if success:
-                        logger.debug("Dados persistidos com sucesso")
+                        if logger.isEnabledFor(logging.DEBUG):
+                            logger.debug("Dados persistidos com sucesso: %s",
+                                         json.dumps(data, default=str, ensure_ascii=False))
                     else:
                         logger.error("Falha ao persistir dados")
                 
-                # Aguarda intervalo de leitura (padrão: 5 segundos para simulação rápida)
-                reading_interval = self.config.get('forecast_settings', {}).get('intervalo_leitura_minutos', 0.1) * 60
-                if reading_interval < 5:  # Mínimo de 5 segundos para simulação
-                    reading_interval = 5
-                time.sleep(reading_interval)
+                # Aguarda até o próximo instante de leitura (sem acumular atraso)
+                deadline = max(deadline + self._interval, time.monotonic())
+                if self._stop_event.wait(deadline - time.monotonic()):
+                    break
                 
         except KeyboardInterrupt:
             logger.info("Interrupção manual recebida")
         except Exception as e:
-            logger.error(f"Erro durante execução: {e}")
+            logger.error("Erro durante execução: %s", e)
         finally:
             self.stop()
     
     def stop(self):
-        """Para o listener"""
+        """Para o listener, gravando as leituras ainda pendentes"""
+        self.flush()
+        self._stop_event.set()
+        self._parar_stream()
         if not self.running:
             return
         
@@ -244,6 +457,8 @@ class WokwiListener:
         return {
             "running": self.running,
             "simulation_active": self.simulation_active,
+            "leituras_pendentes": len(self._buffer),
+            "leituras_descartadas": self._descartadas,
             "last_update": datetime.now().isoformat()
         }
 
@@ -260,12 +475,12 @@ class WokwiListenerManager:
     def create_listener(self, name: str = "default") -> WokwiListener:
         """Cria um novo listener"""
         if name in self.listeners:
-            logger.warning(f"Listener '{name}' já existe")
+            logger.warning("Listener '%s' já existe", name)
             return self.listeners[name]
         
         listener = WokwiListener()
         self.listeners[name] = listener
-        logger.info(f"Listener '{name}' criado")
+        logger.info("Listener '%s' criado", name)
         return listener
     
     def start_listener(self, name: str = "default") -> bool:
@@ -277,20 +492,20 @@ class WokwiListenerManager:
             self.listeners[name].start()
             return True
         except Exception as e:
-            logger.error(f"Erro ao iniciar listener '{name}': {e}")
+            logger.error("Erro ao iniciar listener '%s': %s", name, e)
             return False
     
     def stop_listener(self, name: str = "default") -> bool:
         """Para um listener específico"""
         if name not in self.listeners:
-            logger.warning(f"Listener '{name}' não encontrado")
+            logger.warning("Listener '%s' não encontrado", name)
             return False
         
         try:
             self.listeners[name].stop()
             return True
         except Exception as e:
-            logger.error(f"Erro ao parar listener '{name}': {e}")
+            logger.error("Erro ao parar listener '%s': %s", name, e)
             return False
     
     def get_listener_status(self, name: str = "default") -> Optional[Dict[str, Any]]:
@@ -318,7 +533,7 @@ def main():
     except KeyboardInterrupt:
         print("\nEncerrando...")
     except Exception as e:
-        logger.error(f"Erro fatal: {e}")
+        logger.error("Erro fatal: %s", e)
         sys.exit(1)
 
 if __name__ == "__main__":
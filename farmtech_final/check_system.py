@@ -6,7 +6,9 @@ Script para verificar se o sistema FarmTech ERP está pronto para execução
 
 import sys
 import os
+import importlib.util
 from pathlib import Path
+from collections import defaultdict
 
 def check_python():
     """Verifica a versão do Python"""
@@ -35,11 +37,11 @@ def check_dependencies():
     
     missing = []
     
+    # find_spec só localiza o pacote, sem executar o import (e suas dependências)
     for dep in dependencies:
-        try:
-            __import__(dep)
+        if importlib.util.find_spec(dep) is not None:
             print(f"   ✅ {dep}")
-        except ImportError:
+        else:
             print(f"   ❌ {dep} - NÃO INSTALADO")
             missing.append(dep)
     
@@ -64,10 +66,23 @@ def check_project_structure():
         'run_erp.py'
     ]
     
+    # Uma listagem (scandir) por diretório em vez de um stat por arquivo
+    por_diretorio = defaultdict(set)
+    for file_path in required_files:
+        diretorio, nome = os.path.split(file_path)
+        por_diretorio[diretorio or '.'].add(nome)
+    
+    existentes = {}
+    for diretorio, nomes in por_diretorio.items():
+        if os.path.isdir(diretorio):
+            with os.scandir(diretorio) as entradas:
+                existentes[diretorio] = {e.name for e in entradas} & nomes
+    
     missing_files = []
     
     for file_path in required_files:
-        if os.path.exists(file_path):
+        diretorio, nome = os.path.split(file_path)
+        if nome in existentes.get(diretorio or '.', ()):
             print(f"   ✅ {file_path}")
         else:
             print(f"   ❌ {file_path} - NÃO ENCONTRADO")
@@ -10,6 +10,7 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
+import streamlit.components.v1 as components
 from datetime import datetime, timedelta
 
 st.set_page_config(page_title="FarmTech ERP", layout="wide", initial_sidebar_state="expanded", page_icon="🌱")
@@ -40,33 +41,89 @@ def init_system():
 system_initialized, config = init_system()
 if not system_initialized: st.stop()
 
+def _converter_timestamp(df):
+    """Garante timestamp em datetime64; linhas do Core já chegam como datetime e não são reconvertidas."""
+    if not pd.api.types.is_datetime64_any_dtype(df['timestamp']):
+        df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601', cache=True)
+    return df
+
 @st.cache_data(ttl=30)
 def carregar_dados(limit=2000):
     try:
         with db_manager.session_scope() as s:
-            leituras = db_manager.get_ultimas_leituras(s, limit=limit)
-            if not leituras: return pd.DataFrame()
-            s.expunge_all()
-            df = pd.DataFrame([vars(l) for l in leituras])
-            df.drop('_sa_instance_state', axis=1, inplace=True)
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            return df.sort_values('timestamp', ascending=False)
+            rows = db_manager.get_ultimas_leituras_raw(s, limit=limit)
+        if not rows: return pd.DataFrame()
+        # Linhas já vêm ordenadas da mais recente para a mais antiga
+        df = pd.DataFrame.from_records(rows, columns=db_manager.LeituraSensor.__table__.columns.keys())
+        return _converter_timestamp(df)
     except Exception as e:
         st.error(f"Erro ao carregar dados: {e}")
         return pd.DataFrame()
 
-# --- Navegação ---
-st.sidebar.title(" Menu de Navegação")
-page = st.sidebar.radio("Módulos:", [" Painel de Controle", " Análise Histórica", " Gerenciamento", " Simulação", " IA e Previsões"])
+@st.cache_data(ttl=30)
+def carregar_dados_num(cols=('umidade', 'ph_estimado', 'temperatura'), limit=2000):
+    """Somente as colunas numéricas pedidas, em float32, projetadas no próprio SQL."""
+    try:
+        with db_manager.session_scope() as s:
+            rows = db_manager.get_colunas_leituras(s, cols, limit=limit)
+        return pd.DataFrame(np.array(rows, dtype=np.float32).reshape(-1, len(cols)), columns=list(cols))
+    except Exception as e:
+        st.error(f"Erro ao carregar dados: {e}")
+        return pd.DataFrame()
 
-# =================== PÁGINAS ===================
+TAMANHO_PAGINA = 50
 
-# --- 1. PAINEL DE CONTROLE ---
-if page == " Painel de Controle":
-    st.header(" Painel de Controle")
-    if st.button(" Atualizar"): st.rerun()
-    
-    latest_reading = carregar_dados(limit=1).iloc[0] if not carregar_dados(limit=1).empty else None
+@st.cache_data(ttl=30)
+def carregar_pagina(offset=0, page_size=TAMANHO_PAGINA):
+    """Uma página de leituras para a tela de CRUD (LIMIT/OFFSET no SQL)."""
+    try:
+        with db_manager.session_scope() as s:
+            rows = db_manager.get_pagina_leituras(s, offset=offset, limit=page_size)
+        df = pd.DataFrame.from_records(rows, columns=db_manager.LeituraSensor.__table__.columns.keys())
+        return _converter_timestamp(df)
+    except Exception as e:
+        st.error(f"Erro ao carregar dados: {e}")
+        return pd.DataFrame()
+
+@st.cache_data(ttl=30)
+def contar_registros():
+    try:
+        with db_manager.session_scope() as s:
+            return db_manager.contar_leituras(s)
+    except Exception as e:
+        st.error(f"Erro ao contar registros: {e}")
+        return 0
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def modelo_arima(serie):
+    """ARIMA ajustado mantido em memória entre interações; o ml_predictor também o persiste em disco.
+
+    A chave é o hash do conteúdo da série (hash_pandas_object, padrão do Streamlit), e só
+    o modelo da série atual fica em memória.
+    """
+    return ml_predictor.train_arima_model(serie, freq_minutes=60)
+
+# Figuras da Análise Histórica: com os mesmos dados, o go.Figure sai do cache em vez de ser
+# reconstruído (a chave é o hash do conteúdo do frame, barato nas 2000 linhas float32)
+@st.cache_data(ttl=30)
+def figura_correlacoes(df):
+    return data_analysis.plot_correlations(df)
+
+@st.cache_data(ttl=30)
+def figura_distribuicao(df, coluna):
+    return data_analysis.plot_distribution(df, coluna)
+
+# Fragmentos (st.fragment) reexecutam só o próprio bloco; em versões < 1.37 o nome ainda é experimental
+_fragment = getattr(st, "fragment", None) or st.experimental_fragment
+
+# Mesmo intervalo do ttl de carregar_dados: antes disso o painel leria o mesmo cache
+INTERVALO_PAINEL_S = 30
+
+@_fragment(run_every=INTERVALO_PAINEL_S)
+def painel_tempo_real():
+    # Uma única consulta alimenta as métricas (linha mais recente) e o gráfico
+    df_recent = carregar_dados(limit=100)
+    latest_reading = df_recent.iloc[0] if not df_recent.empty else None
     
     if latest_reading is not None:
         c1, c2, c3, c4 = st.columns(4)
@@ -78,32 +135,85 @@ if page == " Painel de Controle":
         if latest_reading['emergencia']:
             st.error(" ALERTA DE EMERGÊNCIA ATIVO!")
 
-        df_chart = carregar_dados(limit=100).set_index('timestamp').sort_index()
+        df_chart = df_recent.set_index('timestamp').sort_index()
         fig = px.line(df_chart, y=['umidade', 'ph_estimado', 'temperatura'], title="Métricas Recentes")
         st.plotly_chart(fig, use_container_width=True)
     else:
         st.warning("Nenhum dado encontrado.")
 
+# Cliente do stream WebSocket do listener: atualiza os valores no navegador a cada
+# leitura, sem rerun do script nem consulta ao banco (o estado inicial vem do painel)
+_STREAM_HTML = """
+<div id="live" style="font-family:sans-serif;font-size:0.95rem">
+  <span id="st">⏳ Conectando ao stream...</span>
+  <span id="val" style="margin-left:1rem"></span>
+</div>
+<script>
+function conectar() {
+  const ws = new WebSocket("__URL__");
+  ws.onopen = () => { document.getElementById("st").textContent = "🟢 Ao vivo"; };
+  ws.onmessage = (ev) => {
+    const d = JSON.parse(ev.data);
+    document.getElementById("val").textContent =
+      `${d.timestamp.slice(11, 19)} · Umidade ${d.umidade.toFixed(1)}% · pH ${d.ph_estimado.toFixed(1)} · ` +
+      `Temp. ${d.temperatura.toFixed(1)}°C · Bomba ${d.bomba_ligada ? "Ligada" : "Desligada"}` +
+      (d.emergencia ? " · ⚠️ EMERGÊNCIA" : "");
+  };
+  ws.onclose = () => { document.getElementById("st").textContent = "🔴 Stream indisponível"; setTimeout(conectar, 5000); };
+}
+conectar();
+</script>
+"""
+
+def stream_ao_vivo():
+    cfg = config.get('stream_settings', {})
+    if cfg.get('ws_ativo', False):
+        # Mesmo endereço do bind do listener, salvo quando o acesso externo exige outro nome
+        host = cfg.get('ws_host_cliente') or cfg.get('ws_host', 'localhost')
+        url = f"ws://{host}:{int(cfg.get('ws_port', 8765))}"
+        components.html(_STREAM_HTML.replace("__URL__", url), height=40)
+
+# --- Navegação ---
+st.sidebar.title(" Menu de Navegação")
+page = st.sidebar.radio("Módulos:", [" Painel de Controle", " Análise Histórica", " Gerenciamento", " Simulação", " IA e Previsões"])
+
+# =================== PÁGINAS ===================
+
+# --- 1. PAINEL DE CONTROLE ---
+if page == " Painel de Controle":
+    st.header(" Painel de Controle")
+    st.caption(f"Atualização automática a cada {INTERVALO_PAINEL_S} s.")
+    stream_ao_vivo()
+    painel_tempo_real()
+
 # --- 2. ANÁLISE HISTÓRICA ---
 elif page == " Análise Histórica":
     st.header(" Análise Histórica")
-    df_full = carregar_dados()
-    if not df_full.empty:
-        st.plotly_chart(data_analysis.plot_correlations(df_full), use_container_width=True)
-        st.plotly_chart(data_analysis.plot_distribution(df_full, 'umidade'), use_container_width=True)
+    df_num = carregar_dados_num()
+    if not df_num.empty:
+        st.plotly_chart(figura_correlacoes(df_num), use_container_width=True)
+        st.plotly_chart(figura_distribuicao(df_num, 'umidade'), use_container_width=True)
     else:
         st.warning("Nenhum dado para análise.")
 
 # --- 3. GERENCIAMENTO (CRUD) ---
 elif page == " Gerenciamento":
     st.header(" Gerenciamento de Dados (CRUD)")
-    df_full = carregar_dados()
-    st.dataframe(df_full)
+    total = contar_registros()
+    total_paginas = max(1, -(-total // TAMANHO_PAGINA))
+    pagina = st.number_input("Página", min_value=1, max_value=total_paginas, value=1, step=1)
+    st.dataframe(carregar_pagina((pagina - 1) * TAMANHO_PAGINA))
+    st.caption(f"{total} registros · página {pagina} de {total_paginas}")
     
     st.subheader(" Deletar Registro")
     record_id = st.number_input("ID do registro para deletar", min_value=1, step=1)
     if st.button("Deletar"):
         if services.delete_leitura(record_id):
+            # Toda leitura em cache pode conter a linha apagada
+            carregar_pagina.clear()
+            contar_registros.clear()
+            carregar_dados.clear()
+            carregar_dados_num.clear()
             st.success(f"Registro {record_id} deletado.")
             st.rerun()
         else:
@@ -115,10 +225,26 @@ elif page == " Simulação":
     st.write("Teste a lógica de decisão do sistema.")
     umidade = st.slider("Umidade Sim.", 0.0, 100.0, 50.0)
     ph = st.slider("pH Sim.", 0.0, 14.0, 7.0)
-    resultado = data_analysis.simular_logica_irrigacao(umidade, ph, config['logica_esp32'])
+    logica_cfg = config_manager.get_logica_cfg(config)
+    resultado = data_analysis.simular_logica_irrigacao(umidade, ph, logica_cfg)
     st.write(f"**Decisão:** {resultado['decisao']}")
     st.write(f"**Justificativa:** {resultado['justificativa']}")
 
+    if st.checkbox("Mostrar superfície de decisão (umidade × pH)"):
+        eixo_umidade = np.linspace(0.0, 100.0, 201)
+        eixo_ph = np.linspace(0.0, 14.0, 141)
+        grade_u, grade_ph = np.meshgrid(eixo_umidade, eixo_ph)
+        codigos = data_analysis.simular_logica_irrigacao_grade(grade_u, grade_ph, logica_cfg)
+        motivos = data_analysis.MOTIVOS_LOGICA
+        fig = px.imshow(codigos, x=eixo_umidade, y=eixo_ph, origin='lower', aspect='auto',
+                        zmin=0, zmax=len(motivos) - 1, color_continuous_scale='Viridis',
+                        labels=dict(x="Umidade (%)", y="pH", color="Decisão"),
+                        title="Superfície de decisão da lógica do ESP32")
+        fig.update_coloraxes(colorbar=dict(tickvals=list(range(len(motivos))), ticktext=list(motivos)))
+        fig.add_trace(go.Scatter(x=[umidade], y=[ph], mode='markers', name='Cenário atual',
+                                 marker=dict(color='white', size=12, line=dict(color='black', width=2))))
+        st.plotly_chart(fig, use_container_width=True)
+
 # --- 5. IA E PREVISÕES (O CÓDIGO CORRIGIDO) ---
 elif page == " IA e Previsões":
     st.header(" Inteligência Artificial e Previsões")
@@ -145,13 +271,22 @@ elif page == " IA e Previsões":
 
     with tab2:
         st.subheader(" Forecast de Umidade (ARIMA)")
-        if st.button(" Gerar Forecast"):
+        col_gerar, col_retreinar = st.columns(2)
+        gerar = col_gerar.button(" Gerar Forecast")
+        retreinar = col_retreinar.button(" Retreinar Modelo")
+        if gerar or retreinar:
             with st.spinner("Calculando..."):
                 try:
-                    df_ts = df_historico.set_index('timestamp')['umidade'].sort_index().asfreq('h').fillna(method='ffill')
-                    modelo_arima = ml_predictor.train_arima_model(df_ts)
-                    forecast_df = modelo_arima.get_forecast(steps=24).summary_frame()
-                    st.session_state['arima_forecast'] = forecast_df
+                    if retreinar:
+                        # Descarta o modelo em memória e o artefato em disco
+                        modelo_arima.clear()
+                        ml_predictor.train_arima_model.clear()
+                    # Uma leitura por hora (a última de cada janela), lacunas preenchidas adiante
+                    df_ts = df_historico.set_index('timestamp')['umidade'].sort_index().resample('1h').last().ffill()
+                    if df_ts.empty:
+                        st.warning("Série horária vazia: não há dados para o forecast.")
+                        st.stop()
+                    st.session_state['arima_forecast'] = ml_predictor.forecast_arima(modelo_arima(df_ts), steps=24)
                     st.success(" Forecast gerado!")
                 except Exception as e:
                     st.error(f" Erro no forecast: {e}")
@@ -20,21 +20,33 @@ DEFAULT_PH_COEFFS: tuple[float, float, float, float] = (
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 _COEFFS_FILE = os.path.join(BASE_DIR, "calib_coeffs.txt")
 
+# path -> (mtime, coeficientes): o arquivo só é relido quando é modificado
+_coeffs_cache: dict[str, tuple[float, tuple | None]] = {}
+
 
 def _load_coeffs_from_file(path: str = _COEFFS_FILE):
     """Tenta ler 4 coeficientes (a,b,c,d) de um arquivo texto.
     Retorna tuple ou None.
     """
-    if not os.path.exists(path):
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
         return None
+    cached = _coeffs_cache.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    parsed = None
     try:
-        line = open(path, "r", encoding="utf-8").readline()
+        with open(path, "r", encoding="utf-8") as f:
+            line = f.readline()
         vals = [float(v) for v in line.replace(",", " ").split() if v]
         if len(vals) == 4:
-            return tuple(vals)
+            parsed = tuple(vals)
     except Exception:
         pass
-    return None
+    _coeffs_cache[path] = (mtime, parsed)
+    return parsed
 
 
 def adc_to_ph(raw: int | float, coeffs: Sequence[float] | None = None, adc_max: int = 4095) -> float:
@@ -64,6 +76,22 @@ def adc_to_ph(raw: int | float, coeffs: Sequence[float] | None = None, adc_max:
         raise ValueError("São necessários 4 coeficientes (a,b,c,d)")
     a, b, c, d = coeffs
     x = max(0.0, min(float(raw) / adc_max, 1.0))  # normaliza 0–1
-    ph = a + b * x + c * x ** 2 + d * x ** 3
+    ph = ((d * x + c) * x + b) * x + a  # forma de Horner
     # Limita resultado à faixa 0–14
-    return max(0.0, min(ph, 14.0)) 
\ No newline at end of file
+    return max(0.0, min(ph, 14.0))
+
+
+def adc_to_ph_batch(raw, coeffs: Sequence[float] | None = None, adc_max: int = 4095) -> np.ndarray:
+    """Versão vetorizada de :func:`adc_to_ph` para arrays de leituras do ADC.
+
+    Mesmas regras de saturação: leituras negativas viram 0.0 e leituras
+    acima de *adc_max* viram 14.0.
+    """
+    if coeffs is None:
+        coeffs = _load_coeffs_from_file() or DEFAULT_PH_COEFFS
+    if len(coeffs) != 4:
+        raise ValueError("São necessários 4 coeficientes (a,b,c,d)")
+    raw = np.asarray(raw, dtype=np.float64)
+    x = np.clip(raw / adc_max, 0.0, 1.0)
+    ph = np.clip(np.polynomial.polynomial.polyval(x, np.asarray(coeffs, dtype=np.float64)), 0.0, 14.0)
+    return np.where(raw < 0, 0.0, np.where(raw > adc_max, 14.0, ph)) 
\ No newline at end of file
@@ -19,7 +19,11 @@ import importlib
 import logging
 import os
 import datetime
+import functools
 import warnings
+from types import MappingProxyType
+from collections import namedtuple
+from collections.abc import Mapping
 
 LOGGING_LEVEL = logging.INFO
 logging.basicConfig(
@@ -36,17 +40,13 @@ PIP_MODULE_MAP_DASH = {
     'requests': 'requests', 'sqlalchemy': 'SQLAlchemy',
     'plotly': 'plotly', 'yaml': 'PyYAML'
 }
-INSTALLED_PACKAGES_CACHE_DASH = {}
 
 def ensure_package_dash(module_name, critical=True):
-    if module_name in INSTALLED_PACKAGES_CACHE_DASH:
-        return INSTALLED_PACKAGES_CACHE_DASH[module_name]
     try:
         pkg = importlib.import_module(module_name)
         version = getattr(pkg, '__version__', getattr(pkg, 'VERSION', 'não especificada'))
         if module_name == 'reportlab' and hasattr(pkg, 'Version'): version = pkg.Version
         logger.debug(f"Pacote '{module_name}' já instalado (versão: {version}).")
-        INSTALLED_PACKAGES_CACHE_DASH[module_name] = pkg
         return pkg
     except ImportError:
         pip_name = PIP_MODULE_MAP_DASH.get(module_name, module_name)
@@ -59,14 +59,12 @@ def ensure_package_dash(module_name, critical=True):
             version_after_install = getattr(pkg, '__version__', getattr(pkg, 'VERSION', 'não especificada'))
             if module_name == 'reportlab' and hasattr(pkg, 'Version'): version_after_install = pkg.Version
             logger.info(f"Pacote '{module_name}' importado (versão: {version_after_install}).")
-            INSTALLED_PACKAGES_CACHE_DASH[module_name] = pkg
             return pkg
         except Exception as e:
             logger.error(f"Falha ao instalar/importar '{pip_name}'. Erro: {e}", exc_info=True)
             if critical:
                 print(f"ERRO CRÍTICO: Dependência '{pip_name}' não instalada. Instale manualmente.", file=sys.stderr)
                 sys.exit(1)
-            INSTALLED_PACKAGES_CACHE_DASH[module_name] = None
             return None
 
 logger.info("Dashboard: Verificando dependências...")
@@ -84,23 +82,17 @@ if not st_module:
     sys.exit("ERRO CRÍTICO: Streamlit não está disponível.")
 
 import streamlit as st
-try:
-    from streamlit_autorefresh import st_autorefresh  # Pacote leve para auto-refresh
-except ImportError:
-    st_autorefresh = None
 
 # CONFIGURAÇÃO DA PÁGINA (PRIMEIRO COMANDO STREAMLIT)
 st.set_page_config(page_title="FarmTech PhD Dashboard", layout="wide", initial_sidebar_state="expanded", page_icon="💧")
 
-# Auto-refresh a cada 30s (configurável via barra lateral)
-if st_autorefresh:
-    REFRESH_INTERVAL_SEC = st.sidebar.number_input("Intervalo de refresh (s)", min_value=10, max_value=300, value=30, step=5)
-    st_autorefresh(interval=REFRESH_INTERVAL_SEC * 1000, key="autorefresh")
+# Auto-refresh a cada 30s (configurável via barra lateral); também é o ttl dos agregados em cache.
+# Só os painéis de dados (fragmentos) são reexecutados: CSS, banner, config e sidebar ficam como estão
+REFRESH_INTERVAL_SEC = st.sidebar.number_input("Intervalo de refresh (s)", min_value=10, max_value=300, value=30, step=5)
+_fragment = getattr(st, "fragment", None) or st.experimental_fragment
 
-# Injetar CSS customizado para melhoria de UI e UX
-def load_custom_css():
-    st.markdown(
-        """
+# CSS customizado para melhoria de UI e UX
+_CUSTOM_CSS = """
         <style>
         /* Tipografia e Cores Base */
         :root {
@@ -342,8 +334,11 @@ def load_custom_css():
             }
         }
         </style>
-        """, unsafe_allow_html=True
-    )
+"""
+
+# Injetar CSS customizado
+def load_custom_css():
+    st.markdown(_CUSTOM_CSS, unsafe_allow_html=True)
 
 load_custom_css()
 
@@ -389,20 +384,51 @@ import pandas as pd
 import numpy as np
 import requests
 import yaml
-from sqlalchemy import create_engine, Column, Integer, Float, Boolean, DateTime, String
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy import create_engine, event, MetaData, Table, Column, Integer, Float, Boolean, DateTime, String, text
 from sqlalchemy.exc import OperationalError
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime, timedelta
+try:
+    import orjson  # Serialização rápida das figuras e do JSON do Meteoblue (opcional)
+except ImportError:
+    orjson = None
+try:
+    from numba import njit  # Kernels compilados (opcional)
+except ImportError:
+    njit = None
+try:
+    from plotly_resampler import FigureResampler  # Downsampling dos traços longos (opcional)
+except ImportError:
+    FigureResampler = None
+
+# Janelas móveis no motor numba do pandas quando disponível (senão, o caminho Cython padrão)
+ROLLING_KW = {"engine": "numba", "engine_kwargs": {"nopython": True, "nogil": True, "parallel": True}} if njit else {}
+
+# plotly.express puxa centenas de submódulos: só é importado no primeiro gráfico,
+# depois que banner e sidebar já foram pintados
+@functools.lru_cache(maxsize=1)
+def _plotly():
+    import plotly.express as px
+    import plotly.graph_objects as go
+    import plotly.io as pio
+    # Figuras serializadas pelo orjson (arrays NumPy emitidos direto em C) quando disponível
+    if orjson:
+        pio.json.config.default_engine = "orjson"
+    return px, go
+
+def _px():
+    return _plotly()[0]
+
+def _go():
+    return _plotly()[1]
 
 # # (O Bloco 4: st.set_page_config(...) deve estar ANTES desta seção)
 
 # --- Constantes Padrão Globais para Configuração (DEFINIDAS ANTES DE USAR) ---
+# Seções somente leitura: compartilhadas sem .copy(); um dict novo só nasce ao mesclar com o YAML
 DB_NAME_DEFAULT_GLOBAL_DASH = 'farmtech_phd_data_final_v2.db'
 TABLE_NAME_DEFAULT_GLOBAL_DASH = 'leituras_sensores_phd_v2'
 
-LOGICA_ESP32_PARAMS_DEFAULT_GLOBAL_DASH = {
+LOGICA_ESP32_PARAMS_DEFAULT_GLOBAL_DASH = MappingProxyType({
     'UMIDADE_CRITICA_BAIXA': 15.0, 
     'UMIDADE_MINIMA_PARA_IRRIGAR': 20.0,
     'UMIDADE_ALTA_PARAR_IRRIGACAO': 60.0, 
@@ -410,41 +436,41 @@ LOGICA_ESP32_PARAMS_DEFAULT_GLOBAL_DASH = {
     'PH_IDEAL_MAXIMO': 6.5, 
     'PH_CRITICO_MINIMO': 4.5, 
     'PH_CRITICO_MAXIMO': 7.5,
-}
+})
 
-FORECAST_SETTINGS_DEFAULT_GLOBAL_DASH = {
+FORECAST_SETTINGS_DEFAULT_GLOBAL_DASH = MappingProxyType({
     'num_leituras_futuras': 6, 
     'intervalo_leitura_minutos': 5,
     'alerta_forecast_ativo': True, 
     'arima_p': 1, 
     'arima_d': 1, 
     'arima_q': 1
-}
+})
 
-CUSTO_SETTINGS_DEFAULT_GLOBAL_DASH = {
+CUSTO_SETTINGS_DEFAULT_GLOBAL_DASH = MappingProxyType({
     'custo_agua_reais_por_m3': 5.00, 
     'vazao_bomba_litros_por_hora': 1000.0,
     'tempo_irrigacao_padrao_minutos': 15.0, 
     'custo_energia_kwh': 0.75,
     'potencia_bomba_kw': 0.75
-}
+})
 
-ML_CLASSIFIER_DEFAULT_GLOBAL_DASH = {
+ML_CLASSIFIER_DEFAULT_GLOBAL_DASH = MappingProxyType({
     'test_size': 0.3, 
     'random_state': 42, 
     'n_estimators': 100,
     'min_samples_leaf': 3
-}
+})
 
-REPORT_SETTINGS_DEFAULT_GLOBAL_DASH = {
+REPORT_SETTINGS_DEFAULT_GLOBAL_DASH = MappingProxyType({
     'max_anomalias_no_relatorio': 5, 
     'max_leituras_recentes_tabela_pdf': 15,
     'autor_relatorio': "Diogo Zequini" # Seu nome aqui
-}
+})
 
-CLI_SETTINGS_DEFAULT_GLOBAL_DASH = { 
+CLI_SETTINGS_DEFAULT_GLOBAL_DASH = MappingProxyType({ 
     'max_leituras_tabela_console': 10 
-}
+})
 
 CONFIG_FILE_PATH_GLOBAL_DASH = 'farmtech_config_phd.yaml'
 # OPT: chave de API lida de variável de ambiente para evitar hard-code
@@ -453,100 +479,120 @@ METEOBLUE_API_KEY = os.getenv("METEOBLUE_API_KEY") or "DEMO"
 # (A função @st.cache_resource def carregar_configuracoes_dashboard_corrigido(): continua DEPOIS deste bloco)
 
 
-@st.cache_resource
-def carregar_configuracoes_dashboard_final():
-    default_cfg_interno = {
+def _default_cfg_dashboard():
+    return {
         'db_name': DB_NAME_DEFAULT_GLOBAL_DASH,
         'table_name': TABLE_NAME_DEFAULT_GLOBAL_DASH,
-        'logica_esp32': LOGICA_ESP32_PARAMS_DEFAULT_GLOBAL_DASH.copy(),
-        'custo_settings': CUSTO_SETTINGS_DEFAULT_GLOBAL_DASH.copy(), # Adicionada ao default
+        'logica_esp32': LOGICA_ESP32_PARAMS_DEFAULT_GLOBAL_DASH,
+        'custo_settings': CUSTO_SETTINGS_DEFAULT_GLOBAL_DASH, # Adicionada ao default
         # Adicione outras seções de config default que seu YAML cobre
-        'forecast_settings': {'num_leituras_futuras': 6, 'intervalo_leitura_minutos': 5, 'alerta_forecast_ativo': True, 'arima_p': 1, 'arima_d': 1, 'arima_q': 1},
-        'ml_classifier': {'test_size': 0.3, 'random_state': 42, 'n_estimators': 100, 'min_samples_leaf': 3},
-        'report_settings': {'max_anomalias_no_relatorio': 5, 'max_leituras_recentes_tabela_pdf': 15, 'autor_relatorio': "Diogo Zequini"},
-        'cli_settings': {'max_leituras_tabela_console': 10}
+        'forecast_settings': FORECAST_SETTINGS_DEFAULT_GLOBAL_DASH,
+        'ml_classifier': ML_CLASSIFIER_DEFAULT_GLOBAL_DASH,
+        'report_settings': REPORT_SETTINGS_DEFAULT_GLOBAL_DASH,
+        'cli_settings': CLI_SETTINGS_DEFAULT_GLOBAL_DASH
+    }
+
+def _chaves_achatadas(cfg, prefixo=''):
+    """Chaves em notação pontilhada ('secao.chave'), para comparar estruturas com um único set."""
+    chaves = set()
+    for k, v in cfg.items():
+        chaves.add(prefixo + k)
+        if isinstance(v, Mapping):
+            chaves |= _chaves_achatadas(v, f"{prefixo}{k}.")
+    return chaves
+
+def _mesclar_cfg(default_cfg, config_do_arquivo):
+    """Um nível de merge por seção: valores do arquivo sobrepõem os padrões.
+
+    Seções ausentes no arquivo continuam sendo os próprios padrões (somente leitura).
+    """
+    return {
+        k: {**v, **config_do_arquivo[k]} if isinstance(v, Mapping) and isinstance(config_do_arquivo.get(k), dict)
+        else config_do_arquivo.get(k, v)
+        for k, v in default_cfg.items()
     }
-    config_final_para_uso = default_cfg_interno.copy()
+
+def _ler_yaml_cfg():
+    with open(CONFIG_FILE_PATH_GLOBAL_DASH, 'r', encoding='utf-8') as f:
+        return yaml_module.safe_load(f)
+
+def _escrever_yaml_cfg(cfg):
+    # O emissor YAML não conhece MappingProxyType
+    cfg = {k: dict(v) if isinstance(v, Mapping) else v for k, v in cfg.items()}
+    with open(CONFIG_FILE_PATH_GLOBAL_DASH, 'w', encoding='utf-8') as f:
+        yaml_module.dump(cfg, f, sort_keys=False, allow_unicode=True, indent=4)
+
+@st.cache_resource
+def _migrate_cfg_file():
+    """Uma vez por processo: cria o YAML ou o completa com as chaves padrão que faltam."""
+    if not yaml_module: return
+    default_cfg = _default_cfg_dashboard()
+    try:
+        if not os.path.exists(CONFIG_FILE_PATH_GLOBAL_DASH):
+            logger.warning(f"'{CONFIG_FILE_PATH_GLOBAL_DASH}' não encontrado. Usando padrões e criando.")
+            _escrever_yaml_cfg(default_cfg)
+            logger.info(f"'{CONFIG_FILE_PATH_GLOBAL_DASH}' criado com defaults.")
+            return
+        config_do_arquivo = _ler_yaml_cfg()
+        if not isinstance(config_do_arquivo, dict) or not config_do_arquivo:
+            logger.warning(f"'{CONFIG_FILE_PATH_GLOBAL_DASH}' vazio/malformado. Usando defaults e recriando.")
+            _escrever_yaml_cfg(default_cfg)
+            return
+        # Reescreve só se faltar alguma chave padrão (inclusive arima_p/d/q)
+        if _chaves_achatadas(default_cfg) - _chaves_achatadas(config_do_arquivo):
+            _escrever_yaml_cfg(_mesclar_cfg(default_cfg, config_do_arquivo))
+            logger.info(f"'{CONFIG_FILE_PATH_GLOBAL_DASH}' (re)escrito com estrutura completa/padronizada.")
+    except yaml.YAMLError as e:
+        logger.error(f"Sintaxe YAML em '{CONFIG_FILE_PATH_GLOBAL_DASH}': {e}. Arquivo mantido.")
+    except IOError as e_io:
+        logger.error(f"Não criou/reescreveu '{CONFIG_FILE_PATH_GLOBAL_DASH}': {e_io}")
+
+@st.cache_resource
+def _load_cfg_from_disk():
+    """Configuração final (padrões + YAML), somente leitura."""
+    default_cfg = _default_cfg_dashboard()
+    config_final_para_uso = default_cfg
     if yaml_module and os.path.exists(CONFIG_FILE_PATH_GLOBAL_DASH):
         try:
-            with open(CONFIG_FILE_PATH_GLOBAL_DASH, 'r', encoding='utf-8') as f:
-                config_do_arquivo = yaml_module.safe_load(f)
-            if config_do_arquivo:
+            config_do_arquivo = _ler_yaml_cfg()
+            if isinstance(config_do_arquivo, dict) and config_do_arquivo:
                 logger.info(f"Configurações carregadas de '{CONFIG_FILE_PATH_GLOBAL_DASH}'.")
-                for chave_principal, valor_default_secao in default_cfg_interno.items():
-                    if chave_principal in config_do_arquivo:
-                        if isinstance(valor_default_secao, dict) and isinstance(config_do_arquivo.get(chave_principal), dict):
-                            secao_mesclada = valor_default_secao.copy()
-                            secao_mesclada.update(config_do_arquivo[chave_principal])
-                            config_final_para_uso[chave_principal] = secao_mesclada
-                        else:
-                            config_final_para_uso[chave_principal] = config_do_arquivo[chave_principal]
-                
-                # Tratar arima_order se p,d,q separados existem
-                if 'forecast_settings' in config_final_para_uso and \
-                   all(k in config_final_para_uso['forecast_settings'] for k in ['arima_p', 'arima_d', 'arima_q']):
-                     cfg_fc = config_final_para_uso['forecast_settings']
-                     config_final_para_uso['forecast_settings']['arima_order'] = (cfg_fc['arima_p'], cfg_fc['arima_d'], cfg_fc['arima_q'])
-                
-                # Reescrever o YAML se a estrutura carregada for diferente da final esperada
-                config_para_salvar_yaml = config_final_para_uso.copy()
-                if 'forecast_settings' in config_para_salvar_yaml and \
-                   isinstance(config_para_salvar_yaml['forecast_settings'].get('arima_order'), tuple):
-                    p,d,q = config_para_salvar_yaml['forecast_settings']['arima_order']
-                    config_para_salvar_yaml['forecast_settings']['arima_p'] = p
-                    config_para_salvar_yaml['forecast_settings']['arima_d'] = d
-                    config_para_salvar_yaml['forecast_settings']['arima_q'] = q
-                    if 'arima_order' in config_para_salvar_yaml['forecast_settings']:
-                        del config_para_salvar_yaml['forecast_settings']['arima_order'] 
-                
-                # Verifica se precisa reescrever
-                precisa_reescrever_yaml = False
-                if not all(k in config_do_arquivo for k in default_cfg_interno): # Se faltam chaves default no arquivo
-                    precisa_reescrever_yaml = True
-                else: # Checa se os sub-dicionários também estão completos
-                    for k_default, v_default_section in default_cfg_interno.items():
-                        if isinstance(v_default_section, dict):
-                            if not all(sub_k in config_do_arquivo.get(k_default,{}) for sub_k in v_default_section):
-                                precisa_reescrever_yaml = True; break
-                if config_para_salvar_yaml != config_do_arquivo and any(k not in config_do_arquivo.get('forecast_settings', {}) for k in ['arima_p','arima_d','arima_q']): # Se arima p,d,q não estavam no arquivo
-                    precisa_reescrever_yaml = True
-
-                if precisa_reescrever_yaml:
-                    try:
-                        with open(CONFIG_FILE_PATH_GLOBAL_DASH, 'w', encoding='utf-8') as f_save:
-                            yaml_module.dump(config_para_salvar_yaml, f_save, sort_keys=False, allow_unicode=True, indent=4)
-                        logger.info(f"'{CONFIG_FILE_PATH_GLOBAL_DASH}' (re)escrito com estrutura completa/padronizada.")
-                    except IOError as e_write:
-                        logger.error(f"Não reescreveu '{CONFIG_FILE_PATH_GLOBAL_DASH}': {e_write}")
-            else:
-                 logger.warning(f"'{CONFIG_FILE_PATH_GLOBAL_DASH}' vazio/malformado. Usando defaults e recriando.")
-                 # Recria com p,d,q separados
-                 with open(CONFIG_FILE_PATH_GLOBAL_DASH, 'w', encoding='utf-8') as f_create_empty:
-                    yaml_module.dump(default_cfg_interno, f_create_empty, sort_keys=False, allow_unicode=True, indent=4)
-            return config_final_para_uso
+                config_final_para_uso = _mesclar_cfg(default_cfg, config_do_arquivo)
         except yaml.YAMLError as e:
             logger.error(f"Sintaxe YAML em '{CONFIG_FILE_PATH_GLOBAL_DASH}': {e}. Usando padrões.")
-            return default_cfg_interno
         except Exception as e_gen:
             logger.error(f"Erro geral ao carregar '{CONFIG_FILE_PATH_GLOBAL_DASH}': {e_gen}. Usando padrões.")
-            return default_cfg_interno
-    else:
-        logger.warning(f"'{CONFIG_FILE_PATH_GLOBAL_DASH}' não encontrado. Usando padrões e criando.")
-        try:
-            with open(CONFIG_FILE_PATH_GLOBAL_DASH, 'w', encoding='utf-8') as f:
-                yaml_module.dump(default_cfg_interno, f, sort_keys=False, allow_unicode=True, indent=4)
-            logger.info(f"'{CONFIG_FILE_PATH_GLOBAL_DASH}' criado com defaults.")
-        except IOError as e_io_create:
-            logger.error(f"Não criou '{CONFIG_FILE_PATH_GLOBAL_DASH}': {e_io_create}")
-        return default_cfg_interno
+
+    # arima_order derivado de p,d,q separados (só em memória; o YAML guarda p,d,q)
+    cfg_fc = config_final_para_uso['forecast_settings']
+    if not isinstance(cfg_fc, Mapping):  # Seção vazia (null) no YAML: usa os padrões
+        cfg_fc = FORECAST_SETTINGS_DEFAULT_GLOBAL_DASH
+    if all(k in cfg_fc for k in ('arima_p', 'arima_d', 'arima_q')):
+        cfg_fc = {**cfg_fc, 'arima_order': (cfg_fc['arima_p'], cfg_fc['arima_d'], cfg_fc['arima_q'])}
+    config_final_para_uso['forecast_settings'] = cfg_fc
+    return MappingProxyType(config_final_para_uso)
+
+def carregar_configuracoes_dashboard_final():
+    _migrate_cfg_file()
+    return _load_cfg_from_disk()
 
 config_app = carregar_configuracoes_dashboard_final()
 
 # Usa as configurações carregadas ou os defaults globais
 DB_NAME_APP = config_app.get('db_name', DB_NAME_DEFAULT_GLOBAL_DASH)
 TABLE_NAME_APP = config_app.get('table_name', TABLE_NAME_DEFAULT_GLOBAL_DASH)
-LOGICA_ESP32_PARAMS_APP_CONFIG = config_app.get('logica_esp32', LOGICA_ESP32_PARAMS_DEFAULT_GLOBAL_DASH.copy())
-CUSTO_CFG_APP_CONFIG = config_app.get('custo_settings', CUSTO_SETTINGS_DEFAULT_GLOBAL_DASH.copy())
+LOGICA_ESP32_PARAMS_APP_CONFIG = config_app.get('logica_esp32', LOGICA_ESP32_PARAMS_DEFAULT_GLOBAL_DASH)
+CUSTO_CFG_APP_CONFIG = config_app.get('custo_settings', CUSTO_SETTINGS_DEFAULT_GLOBAL_DASH)
+
+# Constantes de custo com as conversões de unidade já aplicadas (uma vez por carga de config)
+CustosConsts = namedtuple('CustosConsts', 'm3_por_h preco_m3 kw preco_kwh intervalo_h')
+CUSTOS_APP = CustosConsts(
+    float(CUSTO_CFG_APP_CONFIG['vazao_bomba_litros_por_hora']) / 1000.0,
+    float(CUSTO_CFG_APP_CONFIG['custo_agua_reais_por_m3']),
+    float(CUSTO_CFG_APP_CONFIG['potencia_bomba_kw']),
+    float(CUSTO_CFG_APP_CONFIG['custo_energia_kwh']),
+    float(config_app.get('forecast_settings', {}).get('intervalo_leitura_minutos', 5)) / 60.0,
+)
 
 
 # --- Sidebar ---
@@ -556,50 +602,127 @@ default_lat_app, default_lon_app = -22.9083, -43.1964
 sim_lat_app = st.sidebar.number_input("Latitude", value=default_lat_app, format="%.4f", key="app_lat_v3")
 sim_lon_app = st.sidebar.number_input("Longitude", value=default_lon_app, format="%.4f", key="app_lon_v3")
 st.sidebar.info(f"Meteoblue API: {'DEMO' if METEOBLUE_API_KEY=='DEMO' else 'OK'} | Lat/Lon: {sim_lat_app:.2f}, {sim_lon_app:.2f}")
+st.sidebar.subheader("Dados Históricos")
+limite_leituras_app = st.sidebar.number_input("Máx. de leituras carregadas", min_value=100, max_value=200000, value=10000, step=100, key="app_limite_leituras")
+periodo_completo_app = st.sidebar.checkbox("Estatísticas do período completo", value=False, key="app_periodo_completo",
+                                           help="Agrega todo o histórico em blocos, sem carregá-lo inteiro na memória")
 
 
 # --- Conexão com Banco de Dados e Definição da Tabela ---
-BaseDB_App = declarative_base()
+# Tabela no Core: o dashboard só lê via SQL, então o ORM (sessões, mapper) não é carregado
+MetaDB_App = MetaData()
 engine_app_conn = None
-SessionLocal_App = None
 try:
     engine_app_conn = create_engine(f"sqlite:///{DB_NAME_APP}?check_same_thread=False")
-    SessionLocal_App = sessionmaker(autocommit=False, autoflush=False, bind=engine_app_conn)
-    class LeituraSensorApp(BaseDB_App):
-        __tablename__ = TABLE_NAME_APP
-        __table_args__ = {'extend_existing': True}
-        id = Column(Integer, primary_key=True)
-        timestamp = Column(DateTime, unique=True, nullable=False)
-        umidade = Column(Float, nullable=False)
-        ph_estimado = Column(Float, nullable=False)
-        fosforo_presente = Column(Boolean, nullable=False)
-        potassio_presente = Column(Boolean, nullable=False)
-        temperatura = Column(Float)
-        bomba_ligada = Column(Boolean, nullable=False)
-        decisao_logica_esp32 = Column(String, nullable=True)
-        emergencia = Column(Boolean, nullable=False)
-    BaseDB_App.metadata.create_all(bind=engine_app_conn)
+
+    # Leitura em massa: WAL (o coletor grava sem bloquear o dashboard), cache de
+    # páginas de 64 MiB e mmap de 256 MiB mantêm a tabela em memória entre reruns
+    @event.listens_for(engine_app_conn, "connect")
+    def _pragmas_sqlite_app(dbapi_con, _):
+        cur = dbapi_con.cursor()
+        cur.execute("PRAGMA journal_mode=WAL")
+        cur.execute("PRAGMA synchronous=NORMAL")
+        cur.execute("PRAGMA mmap_size=268435456")
+        cur.execute("PRAGMA cache_size=-65536")
+        cur.close()
+
+    leituras_sensor_app = Table(
+        TABLE_NAME_APP, MetaDB_App,
+        Column('id', Integer, primary_key=True),
+        Column('timestamp', DateTime, unique=True, nullable=False),
+        Column('umidade', Float, nullable=False),
+        Column('ph_estimado', Float, nullable=False),
+        Column('fosforo_presente', Boolean, nullable=False),
+        Column('potassio_presente', Boolean, nullable=False),
+        Column('temperatura', Float),
+        Column('bomba_ligada', Boolean, nullable=False),
+        Column('decisao_logica_esp32', String, nullable=True),
+        Column('emergencia', Boolean, nullable=False),
+        extend_existing=True,
+    )
+    MetaDB_App.create_all(bind=engine_app_conn)
+    # ORDER BY timestamp DESC LIMIT n vira varredura do índice
+    with engine_app_conn.begin() as conn_idx:
+        conn_idx.execute(text(f"CREATE INDEX IF NOT EXISTS idx_{TABLE_NAME_APP}_ts_desc ON {TABLE_NAME_APP}(timestamp DESC)"))
 except Exception as e_db_app_setup:
     logger.error(f"Erro DB dashboard: {e_db_app_setup}", exc_info=True)
     st.error(f"Erro crítico DB: {e_db_app_setup}. Verifique '{DB_NAME_APP}'.")
 
 # --- Funções de Apoio (carregar dados, buscar clima, simular lógica) ---
-@st.cache_data(ttl=300)
-def carregar_dados_historicos_app():
-    if not engine_app_conn or not SessionLocal_App: return pd.DataFrame()
+# Só as colunas usadas pelas abas (sem id), com dtypes fixos para evitar coerção a object.
+# Leituras de sensor não precisam de mais que float32: metade dos bytes em cada operação seguinte
+COLUNAS_HISTORICO_APP = {
+    'umidade': 'float32', 'ph_estimado': 'float32', 'fosforo_presente': 'bool',
+    'potassio_presente': 'bool', 'temperatura': 'float32', 'bomba_ligada': 'bool',
+    'decisao_logica_esp32': 'object', 'emergencia': 'bool',
+}
+SQL_HISTORICO_APP = text(
+    f"SELECT timestamp, {', '.join(COLUNAS_HISTORICO_APP)} FROM {TABLE_NAME_APP} "
+    "ORDER BY timestamp DESC LIMIT :n"
+)
+
+@st.cache_data(ttl=REFRESH_INTERVAL_SEC)
+def carregar_dados_historicos_app(limite=10000):
+    if not engine_app_conn: return pd.DataFrame()
     try:
-        with SessionLocal_App() as db:
-            query = db.query(LeituraSensorApp).order_by(LeituraSensorApp.timestamp.desc())
-            df = pd.read_sql(query.statement, db.bind, index_col='timestamp', parse_dates=['timestamp'])
-        if not df.empty:
-            if df.index.tz is None: df.index = df.index.tz_localize('UTC')
-            else: df.index = df.index.tz_convert('UTC')
+        with engine_app_conn.connect() as conn:
+            # Índice já nasce tz-aware em UTC (sem tz_localize/tz_convert depois)
+            df = pd.read_sql(SQL_HISTORICO_APP, conn, params={"n": int(limite)}, index_col='timestamp',
+                             parse_dates={'timestamp': {'utc': True}}, dtype=COLUNAS_HISTORICO_APP)
+        _aquecer_rolling()
         return df
     except Exception as e:
         logger.error(f"Erro ao carregar dados histórico para App: {e}", exc_info=True)
         st.warning(f"Não foi possível carregar dados históricos (Tabela '{TABLE_NAME_APP}' existe?).")
         return pd.DataFrame()
 
+@st.cache_resource
+def _aquecer_rolling():
+    """Compila os kernels de janela móvel uma vez por processo, fora da primeira interação."""
+    if ROLLING_KW:
+        r = pd.Series(np.zeros(32)).rolling(window=7)
+        r.mean(**ROLLING_KW), r.std(**ROLLING_KW)
+
+@st.cache_resource
+def _mb_session():
+    """Sessão HTTP compartilhada: reaproveita a conexão TLS entre atualizações."""
+    s = requests.Session()
+    s.headers['User-Agent'] = 'FarmTech/1.0'
+    adapter = requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=4)
+    s.mount('https://', adapter)
+    return s
+
+@st.cache_resource
+def _mb_validadores():
+    """(pacote, lat, lon) -> (ETag, Last-Modified, corpo) da última resposta 200."""
+    return {}
+
+SQL_STATS_AGREGADOS_APP = text(
+    f"SELECT umidade, ph_estimado, bomba_ligada FROM {TABLE_NAME_APP} ORDER BY timestamp"
+)
+
+@st.cache_data(ttl=300)
+def carregar_stats_agregados_app(intervalo_registros_min=5, chunksize=50000):
+    """Estatísticas do histórico inteiro lidas em blocos: só um bloco fica em memória."""
+    stats = {'leituras': 0, 'minutos_bomba': 0.0, 'ciclos': 0,
+             'umidade_min': float('inf'), 'ph_min': float('inf'), 'ph_max': float('-inf')}
+    if not engine_app_conn: return stats
+    anterior = None  # Última leitura do bloco anterior: ciclos que cruzam a fronteira entre blocos
+    with engine_app_conn.connect() as conn:
+        for chunk in pd.read_sql_query(SQL_STATS_AGREGADOS_APP, conn, chunksize=chunksize):
+            if chunk.empty: continue
+            b = chunk['bomba_ligada'].to_numpy(dtype=bool)
+            stats['leituras'] += len(b)
+            stats['minutos_bomba'] += np.count_nonzero(b) * intervalo_registros_min
+            stats['ciclos'] += int(np.count_nonzero(b[1:] & ~b[:-1]))
+            if anterior is not None and b[0] and not anterior:
+                stats['ciclos'] += 1
+            anterior = b[-1]
+            stats['umidade_min'] = min(stats['umidade_min'], float(chunk['umidade'].min()))
+            stats['ph_min'] = min(stats['ph_min'], float(chunk['ph_estimado'].min()))
+            stats['ph_max'] = max(stats['ph_max'], float(chunk['ph_estimado'].max()))
+    return stats
+
 @st.cache_data(ttl=1800)
 def buscar_dados_meteoblue_app(lat, lon, tipo_pacote="basic-1h"):
     api_key_interna_mb = METEOBLUE_API_KEY
@@ -611,14 +734,24 @@ def buscar_dados_meteoblue_app(lat, lon, tipo_pacote="basic-1h"):
         "temperature": "C", "windspeed": "kmh", "precipitationamount": "mm",
         "timeformat": "iso8601", "forecast_days": 3
     }
+    chave_validador = (tipo_pacote, lat, lon)
+    etag, last_modified, data_anterior = _mb_validadores().get(chave_validador, (None, None, None))
+    headers_cond = {}
+    if etag: headers_cond['If-None-Match'] = etag
+    if last_modified: headers_cond['If-Modified-Since'] = last_modified
     try:
-        response = requests.get(base_url, params=params, timeout=15)
+        response = _mb_session().get(base_url, params=params, headers=headers_cond, timeout=15)
+        if response.status_code == 304 and data_anterior is not None:
+            return data_anterior, None  # Previsão inalterada: sem baixar nem interpretar o JSON de novo
         response.raise_for_status()
-        data = response.json()
+        # orjson interpreta o pacote horário (centenas de KB de números) em C
+        data = orjson.loads(response.content) if orjson else response.json()
         if "metadata" not in data or (tipo_pacote == "basic-day" and "data_day" not in data) or \
            (tipo_pacote == "basic-1h" and "data_1h" not in data) :
             logger.error(f"Estrutura API Meteoblue inesperada ({tipo_pacote}): {data}")
             return None, "Resposta API Meteoblue com estrutura inesperada."
+        if 'ETag' in response.headers or 'Last-Modified' in response.headers:
+            _mb_validadores()[chave_validador] = (response.headers.get('ETag'), response.headers.get('Last-Modified'), data)
         return data, None
     except requests.exceptions.Timeout:
         logger.error(f"Timeout Meteoblue ({tipo_pacote}).")
@@ -633,22 +766,34 @@ def buscar_dados_meteoblue_app(lat, lon, tipo_pacote="basic-1h"):
         return None, f"Erro ao buscar dados Meteoblue ({tipo_pacote})."
 
 
+# Textos dos motivos por código (0..7): a lógica decide em códigos e o texto só é
+# formatado para o que de fato é exibido
+MOTIVOS_TEMPLATE_APP = (
+    "Condições padrão, bomba desligada.",
+    "EMERGÊNCIA: Umidade crítica ({u:.1f}%)",
+    "pH crítico ({ph:.1f}%)",
+    "Umid. baixa ({u:.1f}%), pH ideal ({ph:.1f}), P&K OK",
+    "Umid. baixa ({u:.1f}%), pH ideal ({ph:.1f}), P ou K OK",
+    "Umid. baixa ({u:.1f}%), pH ideal ({ph:.1f}), Nutrientes Ausentes",
+    "Umid. baixa ({u:.1f}%), mas pH ({ph:.1f}) não ideal",
+    "Umidade alta ({u:.1f}%)",
+)
+
 def simular_logica_irrigacao_app(umidade, ph, p, k, cfg_logica: dict, chuva_mm=0.0):
     # (Lógica do ESP32 - replicada e usando cfg_logica)
-    ligar_bomba, motivo = False, "Condições padrão, bomba desligada."
+    ligar_bomba, codigo = False, 0
     if umidade < cfg_logica['UMIDADE_CRITICA_BAIXA']:
-        ligar_bomba, motivo = True, f"EMERGÊNCIA: Umidade crítica ({umidade:.1f}%)"
+        ligar_bomba, codigo = True, 1
     elif ph < cfg_logica['PH_CRITICO_MINIMO'] or ph > cfg_logica['PH_CRITICO_MAXIMO']:
-        ligar_bomba, motivo = False, f"pH crítico ({ph:.1f}%)"
+        ligar_bomba, codigo = False, 2
     elif umidade < cfg_logica['UMIDADE_MINIMA_PARA_IRRIGAR']:
         if cfg_logica['PH_IDEAL_MINIMO'] <= ph <= cfg_logica['PH_IDEAL_MAXIMO']:
             ligar_bomba = True
-            if p and k: motivo = f"Umid. baixa ({umidade:.1f}%), pH ideal ({ph:.1f}), P&K OK"
-            elif p or k: motivo = f"Umid. baixa ({umidade:.1f}%), pH ideal ({ph:.1f}), P ou K OK"
-            else: motivo = f"Umid. baixa ({umidade:.1f}%), pH ideal ({ph:.1f}), Nutrientes Ausentes"
-        else: motivo = f"Umid. baixa ({umidade:.1f}%), mas pH ({ph:.1f}) não ideal"
+            codigo = 3 if p and k else 4 if p or k else 5
+        else: codigo = 6
     elif umidade > cfg_logica['UMIDADE_ALTA_PARAR_IRRIGACAO']:
-        ligar_bomba, motivo = False, f"Umidade alta ({umidade:.1f}%)"
+        ligar_bomba, codigo = False, 7
+    motivo = MOTIVOS_TEMPLATE_APP[codigo].format(u=umidade, ph=ph)
     
     if ligar_bomba and chuva_mm > 1.0: # Limiar de chuva significativa
         return False, f"DECISÃO BASE: Ligar ({motivo}). AJUSTE CLIMA: DESLIGAR (Chuva: {chuva_mm:.1f}mm)."
@@ -659,47 +804,85 @@ def simular_logica_irrigacao_app(umidade, ph, p, k, cfg_logica: dict, chuva_mm=0
     return ligar_bomba, final_motivo
 
 # --- Funções para Novas Melhorias ---
+# Agregados por período: a parte de cálculo fica em cache e só é refeita quando chega
+# leitura nova (impressão digital = tamanho + timestamp mais recente, sem hashear o frame)
+_HASH_PERIODO = {
+    pd.DataFrame: lambda df: (len(df), df.index.max().value if len(df) else 0),
+    MappingProxyType: lambda m: tuple(sorted(m.items())),  # Seções de config padrão (não serializáveis)
+}
+
+@st.cache_data(ttl=REFRESH_INTERVAL_SEC, max_entries=32, hash_funcs=_HASH_PERIODO)
+def _computar_alertas_recentes(df_periodo, cfg_logica):
+    # Analisar os últimos 5 registros do período selecionado, por exemplo
+    df_recente = df_periodo.tail(5)
+    mask_u = (df_recente['umidade'] < cfg_logica['UMIDADE_CRITICA_BAIXA']).to_numpy()
+    mask_ph = (~df_recente['ph_estimado'].between(cfg_logica['PH_CRITICO_MINIMO'], cfg_logica['PH_CRITICO_MAXIMO'])).to_numpy()
+    quando = pd.Series(df_recente.index.strftime('%d/%m %H:%M'), index=df_recente.index)
+
+    return (
+        ("🔴 Umidade Crítica (" + df_recente['umidade'][mask_u].map('{:.1f}'.format) + "%) em " + quando[mask_u]).tolist()
+        + ("🟡 pH Fora da Faixa Segura (" + df_recente['ph_estimado'][mask_ph].map('{:.1f}'.format) + ") em " + quando[mask_ph]).tolist()
+    )
+
 def analisar_alertas_recentes_app(df_periodo, cfg_logica, console=st):
     """Analisa os dados mais recentes do período e exibe alertas."""
     if df_periodo.empty: return
-    alertas = []
-    # Analisar os últimos 5 registros do período selecionado, por exemplo
-    df_recente = df_periodo.tail(5) 
-    for idx, row in df_recente.iterrows():
-        if row['umidade'] < cfg_logica['UMIDADE_CRITICA_BAIXA']:
-            alertas.append(f"🔴 Umidade Crítica ({row['umidade']:.1f}%) em {idx.strftime('%d/%m %H:%M')}")
-        if not (cfg_logica['PH_CRITICO_MINIMO'] <= row['ph_estimado'] <= cfg_logica['PH_CRITICO_MAXIMO']):
-            alertas.append(f"🟡 pH Fora da Faixa Segura ({row['ph_estimado']:.1f}) em {idx.strftime('%d/%m %H:%M')}")
+    alertas = _computar_alertas_recentes(df_periodo, cfg_logica)
     
     if alertas:
         console.warning("🚨 Painel de Alertas Rápidos (Dados Recentes):")
-        for alerta in alertas:
-            console.markdown(f"- {alerta}")
+        console.markdown("\n".join(f"- {alerta}" for alerta in alertas))
     else:
         console.info("✅ Sem alertas críticos nos dados recentes do período selecionado.")
 
-def calcular_custos_operacionais_app(df_periodo, cfg_custos, cfg_geral, console=st):
+if njit is not None:
+    @njit(cache=True)
+    def _agregar_bomba(b, intervalo):
+        """(tempo ligada na unidade de `intervalo`, ciclos) em uma única passada; a 1ª leitura não abre ciclo."""
+        on = 0
+        ciclos = 0
+        anterior = True
+        for v in b:
+            on += v
+            ciclos += v and not anterior
+            anterior = v
+        return on * intervalo, ciclos
+else:
+    _agregar_bomba = None
+
+@st.cache_data(ttl=REFRESH_INTERVAL_SEC, max_entries=32, hash_funcs=_HASH_PERIODO)
+def _computar_custos(df_periodo, custos):
+    """Retorna (custo_agua, custo_energia, ciclos); custos None se a bomba não ligou."""
+    if _agregar_bomba is not None:
+        tempo_bomba_ligada_h, num_ciclos_estimados = _agregar_bomba(
+            df_periodo['bomba_ligada'].to_numpy(dtype=bool), custos.intervalo_h)
+        num_ciclos_estimados = int(num_ciclos_estimados)
+    else:
+        # Buffer bool (1 byte/leitura): soma e bordas de subida sem arrays temporários int/float
+        bomba = df_periodo['bomba_ligada'].to_numpy(dtype=bool)
+        num_ciclos_estimados = int(np.count_nonzero(bomba[1:] & ~bomba[:-1]))
+        tempo_bomba_ligada_h = np.count_nonzero(bomba) * custos.intervalo_h
+    
+    if tempo_bomba_ligada_h == 0:
+        return None, None, 0
+    
+    custo_total_agua = custos.m3_por_h * tempo_bomba_ligada_h * custos.preco_m3
+    custo_total_energia = custos.kw * tempo_bomba_ligada_h * custos.preco_kwh
+    
+    return custo_total_agua, custo_total_energia, num_ciclos_estimados
+
+def calcular_custos_operacionais_app(df_periodo, custos=CUSTOS_APP, console=st):
     if df_periodo.empty or 'bomba_ligada' not in df_periodo.columns:
         console.info("Custos: Dados insuficientes para cálculo.")
         return 0.0, 0.0, 0
     
-    intervalo_registros_min = cfg_geral.get('forecast_settings', {}).get('intervalo_leitura_minutos', 5)
-    tempo_bomba_ligada_min = df_periodo['bomba_ligada'].sum() * intervalo_registros_min
+    custo_total_agua, custo_total_energia, num_ciclos_estimados = _computar_custos(df_periodo, custos)
     
-    if tempo_bomba_ligada_min == 0:
+    if custo_total_agua is None:
         console.info("Custos: Bomba não foi acionada no período. Custo zero.")
         return 0.0, 0.0, 0
     
-    tempo_bomba_ligada_h = tempo_bomba_ligada_min / 60.0
-    volume_agua_usado_m3 = (cfg_custos['vazao_bomba_litros_por_hora'] / 1000.0) * tempo_bomba_ligada_h
-    custo_total_agua = volume_agua_usado_m3 * cfg_custos['custo_agua_reais_por_m3']
-    
-    consumo_energia_kwh = cfg_custos['potencia_bomba_kw'] * tempo_bomba_ligada_h
-    custo_total_energia = consumo_energia_kwh * cfg_custos['custo_energia_kwh']
-    
     custo_operacional_total = custo_total_agua + custo_total_energia
-    num_ciclos_estimados = df_periodo['bomba_ligada'].astype(int).diff().fillna(0).eq(1).sum()
-
 
     console.metric("Ciclos de Irrigação Estimados", num_ciclos_estimados)
     col1, col2, col3 = console.columns(3)
@@ -709,17 +892,31 @@ def calcular_custos_operacionais_app(df_periodo, cfg_custos, cfg_geral, console=
     return custo_total_agua, custo_total_energia, num_ciclos_estimados
 
 
+@st.cache_data(ttl=REFRESH_INTERVAL_SEC, max_entries=32, hash_funcs=_HASH_PERIODO)
+def _computar_diagnostico(df_periodo, cfg_logica):
+    bomba = df_periodo['bomba_ligada'].to_numpy(dtype=bool)
+    umidade = df_periodo['umidade'].to_numpy()
+    ph = df_periodo['ph_estimado'].to_numpy()
+    return {
+        # Umidade média no acionamento (None se a bomba não ligou)
+        'umid_media_acionamento': float(umidade[bomba].mean()) if bomba.any() else None,
+        'ph_medio': float(np.nanmean(ph)),
+        'umidade_critica_ocorrencias': int(np.count_nonzero(umidade < cfg_logica['UMIDADE_CRITICA_BAIXA'])),
+        'ph_critico_ocorrencias': int(np.count_nonzero(
+            (ph < cfg_logica['PH_CRITICO_MINIMO']) | (ph > cfg_logica['PH_CRITICO_MAXIMO']))),
+    }
+
 def gerar_diagnostico_sugestoes_app(df_periodo, cfg_logica, console=st):
     if df_periodo.empty or len(df_periodo) < 5: # Precisa de alguns dados para diagnóstico
         console.info("Diagnóstico: Dados insuficientes para um diagnóstico detalhado.")
         return
 
+    diag = _computar_diagnostico(df_periodo, cfg_logica)
     with console.expander("🔬 Diagnóstico do Sistema e Sugestões (Beta)"):
         st.markdown("**Análise de Comportamento:**")
         # Umidade média no acionamento
-        df_bomba_on = df_periodo[df_periodo['bomba_ligada'] == True]
-        if not df_bomba_on.empty:
-            umid_media_acionamento = df_bomba_on['umidade'].mean()
+        umid_media_acionamento = diag['umid_media_acionamento']
+        if umid_media_acionamento is not None:
             st.write(f"- Umidade média no momento do acionamento da bomba: **{umid_media_acionamento:.1f}%**.")
             if umid_media_acionamento < cfg_logica['UMIDADE_MINIMA_PARA_IRRIGAR'] - 5: # Se aciona muito abaixo
                 st.caption("  Sugestão: A bomba está sendo acionada com umidade já consideravelmente baixa. Verifique se o limiar de irrigação está adequado ou se há atrasos na resposta do sistema.")
@@ -729,14 +926,14 @@ def gerar_diagnostico_sugestoes_app(df_periodo, cfg_logica, console=st):
             st.write("- Bomba não foi acionada no período para análise de umidade de acionamento.")
 
         # pH médio
-        ph_medio_periodo = df_periodo['ph_estimado'].mean()
+        ph_medio_periodo = diag['ph_medio']
         st.write(f"- pH médio no período: **{ph_medio_periodo:.1f}**.")
         if not (cfg_logica['PH_IDEAL_MINIMO'] <= ph_medio_periodo <= cfg_logica['PH_IDEAL_MAXIMO']):
             st.caption(f"  Atenção: O pH médio está fora da faixa ideal ({cfg_logica['PH_IDEAL_MINIMO']}-{cfg_logica['PH_IDEAL_MAXIMO']}). Isso pode afetar a absorção de nutrientes. Considere análise e correção do solo.")
 
         # Frequência de condições críticas
-        umidade_critica_ocorrencias = df_periodo[df_periodo['umidade'] < cfg_logica['UMIDADE_CRITICA_BAIXA']].shape[0]
-        ph_critico_ocorrencias = df_periodo[(df_periodo['ph_estimado'] < cfg_logica['PH_CRITICO_MINIMO']) | (df_periodo['ph_estimado'] > cfg_logica['PH_CRITICO_MAXIMO'])].shape[0]
+        umidade_critica_ocorrencias = diag['umidade_critica_ocorrencias']
+        ph_critico_ocorrencias = diag['ph_critico_ocorrencias']
         
         st.write(f"- Ocorrências de umidade crítica (<{cfg_logica['UMIDADE_CRITICA_BAIXA']}%): **{umidade_critica_ocorrencias}**.")
         if umidade_critica_ocorrencias > len(df_periodo) * 0.1: # Se mais de 10% das leituras foram críticas
@@ -747,26 +944,50 @@ def gerar_diagnostico_sugestoes_app(df_periodo, cfg_logica, console=st):
             st.caption("  Sugestão: Alta frequência de pH crítico. Priorize a correção do pH do solo.")
 
 # --- Funções avançadas de análise de dados
+@st.cache_resource(ttl=REFRESH_INTERVAL_SEC, max_entries=32, hash_funcs=_HASH_PERIODO)
+def _estatisticas_periodo(df):
+    """Colunas do período como ndarrays + média/desvio, extraídos uma vez e compartilhados
+    (somente leitura) por métricas, eficiência e insights."""
+    umidade = df['umidade'].to_numpy()
+    ph = df['ph_estimado'].to_numpy()
+    return {
+        'umidade': umidade,
+        'ph': ph,
+        'bomba': df['bomba_ligada'].to_numpy(dtype=bool),
+        'umidade_mean': float(np.nanmean(umidade)),
+        'umidade_std': float(np.nanstd(umidade, ddof=1)),
+        'ph_std': float(np.nanstd(ph, ddof=1)),
+    }
+
+# Puras sobre o período: em cache pela mesma impressão digital dos agregados acima, então
+# trocar de aba/widget ou repetir a comparação de eficiência não recalcula nada
+@st.cache_data(ttl=REFRESH_INTERVAL_SEC, max_entries=32, hash_funcs=_HASH_PERIODO)
 def calculate_advanced_metrics(df):
     """Calcula métricas avançadas para análise do sistema"""
     if df.empty:
         return None
     
+    stats = _estatisticas_periodo(df)
+    bomba = stats['bomba']
     metrics = {
-        "irrigation_cycles": df['bomba_ligada'].astype(int).diff().fillna(0).eq(1).sum(),
-        "avg_humidity": df['umidade'].mean(),
-        "humidity_std": df['umidade'].std(),
-        "ph_stability": df['ph_estimado'].std(),
-        "critical_events": len(df[df['umidade'] < LOGICA_ESP32_PARAMS_DEFAULT_GLOBAL_DASH['UMIDADE_CRITICA_BAIXA']]),
+        # Bordas de subida no buffer bool (1 byte/leitura); a 1ª leitura não abre ciclo
+        "irrigation_cycles": int(np.count_nonzero(bomba[1:] & ~bomba[:-1])),
+        "avg_humidity": stats['umidade_mean'],
+        "humidity_std": stats['umidade_std'],
+        "ph_stability": stats['ph_std'],
+        "critical_events": int(np.count_nonzero(stats['umidade'] < LOGICA_ESP32_PARAMS_DEFAULT_GLOBAL_DASH['UMIDADE_CRITICA_BAIXA'])),
         "system_efficiency": calculate_system_efficiency(df)
     }
     return metrics
 
+@st.cache_data(ttl=REFRESH_INTERVAL_SEC, max_entries=32, hash_funcs=_HASH_PERIODO)
 def calculate_system_efficiency(df):
     """Calcula a eficiência do sistema baseada em múltiplos fatores"""
     if df.empty:
         return 0
     
+    stats = _estatisticas_periodo(df)
+    
     # Fatores de peso para cada componente
     weights = {
         'humidity_control': 0.4,
@@ -777,29 +998,30 @@ def calculate_system_efficiency(df):
     # Cálculo do controle de umidade
     humidity_ideal = (LOGICA_ESP32_PARAMS_DEFAULT_GLOBAL_DASH['UMIDADE_MINIMA_PARA_IRRIGAR'] + 
                      LOGICA_ESP32_PARAMS_DEFAULT_GLOBAL_DASH['UMIDADE_ALTA_PARAR_IRRIGACAO']) / 2
-    humidity_dev = abs(df['umidade'] - humidity_ideal).mean()
+    humidity_dev = np.nanmean(np.abs(stats['umidade'] - humidity_ideal))
     humidity_score = max(0, 100 - (humidity_dev * 2))
     
     # Cálculo da estabilidade do pH
     ph_ideal = (LOGICA_ESP32_PARAMS_DEFAULT_GLOBAL_DASH['PH_IDEAL_MINIMO'] + 
                 LOGICA_ESP32_PARAMS_DEFAULT_GLOBAL_DASH['PH_IDEAL_MAXIMO']) / 2
-    ph_dev = abs(df['ph_estimado'] - ph_ideal).mean()
+    ph_dev = np.nanmean(np.abs(stats['ph'] - ph_ideal))
     ph_score = max(0, 100 - (ph_dev * 10))
     
     # Cálculo do tempo de resposta
     response_score = 100
     if 'bomba_ligada' in df.columns:
-        critical_points = df[df['umidade'] < LOGICA_ESP32_PARAMS_DEFAULT_GLOBAL_DASH['UMIDADE_MINIMA_PARA_IRRIGAR']]
-        if not critical_points.empty:
-            response_delays = []
-            for idx in critical_points.index:
-                future_window = df.loc[idx:].head(12)  # Próximas 12 leituras
-                if not future_window.empty and 'bomba_ligada' in future_window:
-                    response_time = future_window['bomba_ligada'].values.argmax()
-                    response_delays.append(response_time)
-            if response_delays:
-                avg_response = sum(response_delays) / len(response_delays)
-                response_score = max(0, 100 - (avg_response * 10))
+        crit = np.flatnonzero(stats['umidade'] < LOGICA_ESP32_PARAMS_DEFAULT_GLOBAL_DASH['UMIDADE_MINIMA_PARA_IRRIGAR'])
+        if crit.size:
+            # Próxima leitura com bomba ligada (posição) para cada ponto crítico, via busca binária;
+            # sem acionamento nas próximas 12 leituras conta 0, como o argmax da janela contava
+            on_pos = np.flatnonzero(stats['bomba'])
+            response_delays = np.zeros(crit.size)
+            if on_pos.size:
+                nxt = np.searchsorted(on_pos, crit)
+                atraso = on_pos[np.minimum(nxt, on_pos.size - 1)] - crit
+                response_delays = np.where((nxt < on_pos.size) & (atraso < 12), atraso, 0)
+            avg_response = response_delays.mean()
+            response_score = max(0, 100 - (avg_response * 10))
     
     # Cálculo da eficiência total
     efficiency = (
@@ -811,34 +1033,42 @@ def calculate_system_efficiency(df):
     return round(efficiency, 2)
 
 # Função para criar gráficos avançados com Plotly
+N_PONTOS_GRAFICO = 2000  # Pontos por traço enviados ao navegador (com plotly-resampler)
+
+@st.cache_data(ttl=REFRESH_INTERVAL_SEC, max_entries=16, hash_funcs=_HASH_PERIODO)
 def create_advanced_plotly_chart(df, y_column, title, color_scheme='viridis'):
     """Cria um gráfico Plotly avançado com análises estatísticas"""
     if df.empty or y_column not in df.columns:
         return None
     
-    # Calcula médias móveis e bandas de confiança
-    df['MA7'] = df[y_column].rolling(window=7).mean()
-    df['MA21'] = df[y_column].rolling(window=21).mean()
-    df['std'] = df[y_column].rolling(window=7).std()
-    df['upper_band'] = df['MA7'] + (df['std'] * 2)
-    df['lower_band'] = df['MA7'] - (df['std'] * 2)
+    # Calcula médias móveis e bandas de confiança em arrays locais (o frame do chamador não é alterado)
+    serie = df[y_column]
+    ma7 = serie.rolling(window=7).mean(**ROLLING_KW).to_numpy()
+    ma21 = serie.rolling(window=21).mean(**ROLLING_KW).to_numpy()
+    std7 = serie.rolling(window=7).std(**ROLLING_KW).to_numpy()
+    upper_band = ma7 + (std7 * 2)
+    lower_band = ma7 - (std7 * 2)
     
-    # Cria o gráfico base
+    # Cria o gráfico base (traços WebGL: o histórico inteiro é desenhado pela GPU)
+    go = _go()
     fig = go.Figure()
+    if FigureResampler:
+        # Traços acima de N_PONTOS_GRAFICO são reduzidos (MinMaxLTTB) antes de irem ao navegador
+        fig = FigureResampler(fig, default_n_shown_samples=N_PONTOS_GRAFICO)
     
     # Adiciona as bandas de confiança
-    fig.add_trace(go.Scatter(
+    fig.add_trace(go.Scattergl(
         x=df.index,
-        y=df['upper_band'],
+        y=upper_band,
         fill=None,
         mode='lines',
         line_color='rgba(0,100,80,0.2)',
         showlegend=False
     ))
     
-    fig.add_trace(go.Scatter(
+    fig.add_trace(go.Scattergl(
         x=df.index,
-        y=df['lower_band'],
+        y=lower_band,
         fill='tonexty',
         mode='lines',
         line_color='rgba(0,100,80,0.2)',
@@ -846,26 +1076,26 @@ def create_advanced_plotly_chart(df, y_column, title, color_scheme='viridis'):
     ))
     
     # Adiciona os dados principais
-    fig.add_trace(go.Scatter(
+    fig.add_trace(go.Scattergl(
         x=df.index,
-        y=df[y_column],
+        y=serie,
         mode='lines',
         name=y_column,
         line=dict(color='#2196F3')
     ))
     
     # Adiciona as médias móveis
-    fig.add_trace(go.Scatter(
+    fig.add_trace(go.Scattergl(
         x=df.index,
-        y=df['MA7'],
+        y=ma7,
         mode='lines',
         name='Média Móvel (7 períodos)',
         line=dict(color='#FF9800', dash='dash')
     ))
     
-    fig.add_trace(go.Scatter(
+    fig.add_trace(go.Scattergl(
         x=df.index,
-        y=df['MA21'],
+        y=ma21,
         mode='lines',
         name='Média Móvel (21 períodos)',
         line=dict(color='#4CAF50', dash='dash')
@@ -881,7 +1111,8 @@ def create_advanced_plotly_chart(df, y_column, title, color_scheme='viridis'):
         xaxis_title="Data/Hora",
         yaxis_title=y_column,
         template="plotly_white",
-        hovermode='x unified',
+        hovermode='x',
+        uirevision=y_column,  # Mantém zoom/pan entre reruns do Streamlit
         legend=dict(
             orientation="h",
             yanchor="bottom",
@@ -891,7 +1122,8 @@ def create_advanced_plotly_chart(df, y_column, title, color_scheme='viridis'):
         )
     )
     
-    return fig
+    # No Streamlit não há callback de reamostragem: entrega só a figura já reduzida
+    return go.Figure(fig) if FigureResampler else fig
 
 # Função para criar um relatório executivo
 def create_executive_summary(df, metrics):
@@ -946,76 +1178,97 @@ def calculate_irrigation_cost(minutes, flow_rate, water_cost, power, energy_cost
     energy_total = power * hours * energy_cost
     return water_total + energy_total
 
-def evaluate_soil_conditions(humidity, ph, phosphorus, potassium, params):
-    """Avalia as condições do solo e retorna recomendações"""
-    recommendations = []
-    risk_level = 'baixo'
-    efficiency_impact = 0
-    
-    # Avaliação de umidade
-    if humidity < params['UMIDADE_CRITICA_BAIXA']:
-        risk_level = 'alto'
-        efficiency_impact -= 30
-        recommendations.append({
-            'type': 'critical',
-            'message': '⚠️ Umidade criticamente baixa',
-            'action': 'Irrigação emergencial necessária'
-        })
-    elif humidity < params['UMIDADE_MINIMA_PARA_IRRIGAR']:
-        risk_level = max(risk_level, 'médio')
-        efficiency_impact -= 15
-        recommendations.append({
-            'type': 'warning',
-            'message': '⚡ Umidade abaixo do ideal',
-            'action': 'Considerar irrigação preventiva'
-        })
-    
-    # Avaliação de pH
-    if ph < params['PH_CRITICO_MINIMO']:
-        risk_level = 'alto'
-        efficiency_impact -= 20
-        recommendations.append({
-            'type': 'critical',
-            'message': '🧪 pH criticamente baixo',
-            'action': 'Correção de acidez necessária'
-        })
-    elif ph > params['PH_CRITICO_MAXIMO']:
-        risk_level = 'alto'
-        efficiency_impact -= 20
-        recommendations.append({
-            'type': 'critical',
-            'message': '🧪 pH criticamente alto',
-            'action': 'Correção de alcalinidade necessária'
-        })
-    elif not (params['PH_IDEAL_MINIMO'] <= ph <= params['PH_IDEAL_MAXIMO']):
-        risk_level = max(risk_level, 'médio')
-        efficiency_impact -= 10
-        recommendations.append({
-            'type': 'warning',
-            'message': '🧪 pH fora da faixa ideal',
-            'action': 'Monitorar e planejar correção'
-        })
-    
-    # Avaliação de nutrientes
-    if not (phosphorus and potassium):
-        risk_level = max(risk_level, 'médio')
-        efficiency_impact -= 15
-        recommendations.append({
-            'type': 'warning',
-            'message': '🌱 Deficiência de nutrientes',
-            'action': 'Considerar fertilização'
-        })
+if njit is not None:
+    # Mesmo corpo compilado; aceita escalares ou arrays nas varreduras do simulador
+    calculate_irrigation_cost = njit(cache=True, fastmath=True)(calculate_irrigation_cost)
+
+# Recomendações do avaliador de solo, na ordem em que são emitidas
+RECOMENDACOES_SOLO = (
+    ('umid_critica', {'type': 'critical', 'message': '⚠️ Umidade criticamente baixa', 'action': 'Irrigação emergencial necessária'}),
+    ('umid_baixa', {'type': 'warning', 'message': '⚡ Umidade abaixo do ideal', 'action': 'Considerar irrigação preventiva'}),
+    ('ph_baixo', {'type': 'critical', 'message': '🧪 pH criticamente baixo', 'action': 'Correção de acidez necessária'}),
+    ('ph_alto', {'type': 'critical', 'message': '🧪 pH criticamente alto', 'action': 'Correção de alcalinidade necessária'}),
+    ('ph_fora', {'type': 'warning', 'message': '🧪 pH fora da faixa ideal', 'action': 'Monitorar e planejar correção'}),
+    ('sem_nutrientes', {'type': 'warning', 'message': '🌱 Deficiência de nutrientes', 'action': 'Considerar fertilização'}),
+)
+NIVEIS_RISCO_SOLO = ('baixo', 'médio', 'alto')
+
+def evaluate_soil_conditions_batch(humidity, ph, phosphorus, potassium, params):
+    """Avaliação vetorizada para varreduras do simulador (arrays combinados por broadcast).
+
+    Retorna (risco int8 0=baixo/1=médio/2=alto, impacto na eficiência, flags por recomendação).
+    """
+    u = np.asarray(humidity, dtype=float)
+    p = np.asarray(ph, dtype=float)
+    u_crit = u < params['UMIDADE_CRITICA_BAIXA']
+    u_baixa = ~u_crit & (u < params['UMIDADE_MINIMA_PARA_IRRIGAR'])
+    ph_baixo = p < params['PH_CRITICO_MINIMO']
+    ph_alto = ~ph_baixo & (p > params['PH_CRITICO_MAXIMO'])
+    ph_fora = ~(ph_baixo | ph_alto) & ~((p >= params['PH_IDEAL_MINIMO']) & (p <= params['PH_IDEAL_MAXIMO']))
+    sem_nutrientes = ~(np.asarray(phosphorus, dtype=bool) & np.asarray(potassium, dtype=bool))
     
-    return risk_level, efficiency_impact, recommendations
+    risco = np.select([u_crit | ph_baixo | ph_alto, u_baixa | ph_fora | sem_nutrientes], [2, 1], 0).astype(np.int8)
+    impacto = -30 * u_crit - 15 * u_baixa - 20 * (ph_baixo | ph_alto) - 10 * ph_fora - 15 * sem_nutrientes
+    flags = {
+        'umid_critica': u_crit, 'umid_baixa': u_baixa, 'ph_baixo': ph_baixo,
+        'ph_alto': ph_alto, 'ph_fora': ph_fora, 'sem_nutrientes': sem_nutrientes,
+    }
+    return risco, impacto, flags
+
+def _avaliar_solo_kernel(u, ph, fosforo, potassio, u_critica, u_minima, ph_crit_min, ph_crit_max, ph_ideal_min, ph_ideal_max):
+    """Núcleo escalar: (risco 0..2, impacto, bitmask das RECOMENDACOES_SOLO disparadas, bit i = entrada i)."""
+    risco = 0
+    impacto = 0
+    bits = 0
+    if u < u_critica:
+        risco = 2
+        impacto -= 30
+        bits |= 1
+    elif u < u_minima:
+        risco = max(risco, 1)
+        impacto -= 15
+        bits |= 2
+    if ph < ph_crit_min:
+        risco = 2
+        impacto -= 20
+        bits |= 4
+    elif ph > ph_crit_max:
+        risco = 2
+        impacto -= 20
+        bits |= 8
+    elif not (ph_ideal_min <= ph <= ph_ideal_max):
+        risco = max(risco, 1)
+        impacto -= 10
+        bits |= 16
+    if not (fosforo and potassio):
+        risco = max(risco, 1)
+        impacto -= 15
+        bits |= 32
+    return risco, impacto, bits
+
+if njit is not None:
+    _avaliar_solo_kernel = njit(cache=True)(_avaliar_solo_kernel)
+
+def evaluate_soil_conditions(humidity, ph, phosphorus, potassium, params):
+    """Avalia as condições do solo e retorna recomendações (risco como código, ver NIVEIS_RISCO_SOLO)"""
+    risco, impacto, bits = _avaliar_solo_kernel(
+        float(humidity), float(ph), bool(phosphorus), bool(potassium),
+        float(params['UMIDADE_CRITICA_BAIXA']), float(params['UMIDADE_MINIMA_PARA_IRRIGAR']),
+        float(params['PH_CRITICO_MINIMO']), float(params['PH_CRITICO_MAXIMO']),
+        float(params['PH_IDEAL_MINIMO']), float(params['PH_IDEAL_MAXIMO']))
+    # Bitmask de volta para os dicts Python, fora do código compilado
+    recommendations = [dict(rec) for i, (_, rec) in enumerate(RECOMENDACOES_SOLO) if bits >> i & 1]
+    return int(risco), int(impacto), recommendations
 
 def generate_intelligent_insights(params, historical_data):
     """Gera insights inteligentes baseados nos parâmetros e dados históricos"""
     insights = []
     
     if historical_data is not None and not historical_data.empty:
-        # Análise de tendências
-        recent_data = historical_data.tail(24)  # Últimas 24 leituras
-        avg_humidity = recent_data['umidade'].mean()
+        # Análise de tendências (fatias dos arrays já extraídos do período)
+        stats = _estatisticas_periodo(historical_data)
+        umidade_recente = stats['umidade'][-24:]  # Últimas 24 leituras
+        avg_humidity = float(np.nanmean(umidade_recente))
         
         if abs(params['umidade'] - avg_humidity) > 15:
             insights.append({
@@ -1025,8 +1278,8 @@ def generate_intelligent_insights(params, historical_data):
             })
         
         # Análise de padrões
-        if len(recent_data) >= 24:
-            irrigation_count = recent_data['bomba_ligada'].sum()
+        if umidade_recente.size >= 24:
+            irrigation_count = np.count_nonzero(stats['bomba'][-24:])
             if irrigation_count > 12:  # Mais de 50% do tempo
                 insights.append({
                     'type': 'pattern',
@@ -1042,7 +1295,7 @@ def simulate_advanced_scenario(params, historical_data=None):
     results = {
         'decision': False,
         'explanation': '',
-        'risk_level': 'baixo',
+        'risk_level': 0,  # Código em NIVEIS_RISCO_SOLO; o texto só é montado na exibição
         'efficiency_impact': 0,
         'cost_impact': 0,
         'recommendations': [],
@@ -1094,11 +1347,7 @@ def simulate_advanced_scenario(params, historical_data=None):
 # ... (Logo e Título como antes) ...
 if os.path.exists("logo_farmtech.png"): # Assumindo que você tem um logo.png
     st.image("logo_farmtech.png", width=80)
-
-# Banner principal animado
-st.markdown('<div class="top-banner fade-in">', unsafe_allow_html=True)
-animated_header("FarmTech Solutions - Dashboard Avançado PhD", "🌱")
-st.markdown('</div>', unsafe_allow_html=True)
+# (O banner principal já é exibido no topo da página, logo após o CSS)
 
 # Tabs principais
 tab_historico, tab_sistema, tab_clima, tab_whatif, tab_sobre = st.tabs([
@@ -1110,8 +1359,10 @@ tab_historico, tab_sistema, tab_clima, tab_whatif, tab_sobre = st.tabs([
 ])
 
 # Tab Histórico
-with tab_historico:
-    df_hist_app_main = carregar_dados_historicos_app()
+@_fragment(run_every=REFRESH_INTERVAL_SEC)
+def painel_historico():
+    """Leituras, métricas e gráficos do período; recarregados sem rerodar a página."""
+    df_hist_app_main = carregar_dados_historicos_app(limite_leituras_app)
     if not df_hist_app_main.empty:
         animated_header("Análise Histórica e Diagnóstico", "📊")
         
@@ -1210,13 +1461,13 @@ with tab_historico:
                 st.plotly_chart(fig, use_container_width=True)
             
             elif chart_type == "Análise de Correlação":
-                fig = px.scatter(df_periodo, x="umidade", y="ph_estimado",
+                fig = _px().scatter(df_periodo, x="umidade", y="ph_estimado",
                                color="temperatura", size="temperatura",
-                               title="Correlação entre Variáveis")
+                               title="Correlação entre Variáveis", render_mode='webgl')
                 st.plotly_chart(fig, use_container_width=True)
             
             else:  # Distribuição
-                fig = px.histogram(df_periodo, x="umidade",
+                fig = _px().histogram(df_periodo, x="umidade",
                                  marginal="box",
                                  title="Distribuição da Umidade")
                 st.plotly_chart(fig, use_container_width=True)
@@ -1228,13 +1479,18 @@ with tab_historico:
     else:
         st.info("Nenhum dado histórico disponível. Execute o gerenciador_dados.py para popular o banco.")
 
+with tab_historico:
+    painel_historico()
+
 # --- Adição no Histórico: Comparativo de Eficiência ---
 # BLOCO DUPLICADO REMOVIDO PARA CORREÇÃO DE INDENTAÇÃO
 
 # --- Nova Aba: Sistema ---
-with tab_sistema:
+@_fragment(run_every=REFRESH_INTERVAL_SEC)
+def painel_sistema():
+    """Saúde do sistema e exportação, atualizadas junto com o histórico."""
     st.header("🩺 Relatório de Saúde do Sistema")
-    df_hist_full = carregar_dados_historicos_app()
+    df_hist_full = carregar_dados_historicos_app(limite_leituras_app)
     if df_hist_full.empty:
         st.warning("Sem dados coletados para calcular métricas de saúde do sistema.")
     else:
@@ -1257,6 +1513,20 @@ with tab_sistema:
         st.write(f"pH críticos detectados: **{hist_stats['ph_criticos']}**")
         st.write(f"Decisão mais comum: **{hist_stats['decisao_mais_comum']}**")
 
+    if periodo_completo_app:
+        intervalo_cfg = config_app.get('forecast_settings', {}).get('intervalo_leitura_minutos', 5)
+        stats_completo = carregar_stats_agregados_app(intervalo_cfg)
+        st.subheader("🗂️ Período Completo")
+        if stats_completo['leituras']:
+            c1, c2, c3, c4 = st.columns(4)
+            c1.metric("Leituras", f"{stats_completo['leituras']:,}".replace(",", "."))
+            c2.metric("Bomba Ligada", f"{stats_completo['minutos_bomba'] / 60:.1f} h")
+            c3.metric("Ciclos de Irrigação", stats_completo['ciclos'])
+            c4.metric("Umidade Mínima", f"{stats_completo['umidade_min']:.1f}%")
+            st.caption(f"pH entre {stats_completo['ph_min']:.1f} e {stats_completo['ph_max']:.1f} em todo o histórico.")
+        else:
+            st.info("Sem leituras no histórico.")
+
     st.markdown("---")
     if not df_hist_full.empty:
         csv_exp = df_hist_full.to_csv(index=True).encode('utf-8')
@@ -1268,6 +1538,9 @@ with tab_sistema:
             key="download_csv_sistema"
         )
 
+with tab_sistema:
+    painel_sistema()
+
 # --- Aba: Clima (Meteoblue) ---
 with tab_clima:
     # (Como antes, usando METEOBLUE_API_KEY_FIXA e sim_lat_app, sim_lon_app)
@@ -1313,7 +1586,7 @@ with tab_clima:
                     st.session_state.chuva_mm_meteoblue_proximas_horas_val_main = chuva_prox_val_mb_main
                     st.info(f"Chuva prevista (Meteoblue) para as próximas ~3h: {chuva_prox_val_mb_main:.1f} mm")
                     if plotly_module and not df_h_mb_main.empty:
-                        fig_ch_mb_main = px.bar(df_h_mb_main, y="Chuva (mm)", title="Precipitação Horária Prevista (Meteoblue)")
+                        fig_ch_mb_main = _px().bar(df_h_mb_main, y="Chuva (mm)", title="Precipitação Horária Prevista (Meteoblue)")
                         st.plotly_chart(fig_ch_mb_main, use_container_width=True)
                 except Exception as e_h_proc_mb_main: st.error(f"Processar dados horários Meteoblue: {e_h_proc_mb_main}")
 
@@ -1331,6 +1604,7 @@ def create_weather_forecast_chart(data_1h, hours=24):
         'humidity': data_1h['data_1h']['relativehumidity'][:hours],
     })
     
+    go = _go()
     fig = go.Figure()
     
     # Temperatura
@@ -1406,11 +1680,10 @@ def analyze_weather_risk(data_1h, hours=24):
     risks = []
     data = data_1h['data_1h']
     
-    # Análise das próximas 24 horas
-    precipitation_sum = sum(data['precipitation'][:hours])
-    temp_max = max(data['temperature'][:hours])
-    temp_min = min(data['temperature'][:hours])
-    humidity_avg = sum(data['relativehumidity'][:hours]) / hours
+    # Análise das próximas 24 horas: cada série reduzida em C (podem ter tamanhos diferentes)
+    precipitation_sum = np.asarray(data['precipitation'][:hours], dtype=float).sum()
+    temp_max = np.asarray(data['temperature'][:hours], dtype=float).max()
+    humidity_avg = np.asarray(data['relativehumidity'][:hours], dtype=float).sum() / hours
     
     # Avaliação de riscos
     if precipitation_sum > 20:
@@ -1562,7 +1835,7 @@ with tab_whatif:
             }
             
             # Executa simulação
-            results = simulate_advanced_scenario(simulation_params, df_hist_app_main)
+            results = simulate_advanced_scenario(simulation_params, carregar_dados_historicos_app(limite_leituras_app))
             
             # Exibe resultados
             st.markdown("### 📊 Resultados da Simulação")
@@ -1581,7 +1854,7 @@ with tab_whatif:
             
             col1.metric(
                 "Nível de Risco",
-                results['risk_level'].upper(),
+                NIVEIS_RISCO_SOLO[results['risk_level']].upper(),
                 delta=None,
                 delta_color="off"
             )
@@ -1,5 +1,5 @@
 import pytest
-from backend.calibration import adc_to_ph
+from legacy.backend.calibration import adc_to_ph, adc_to_ph_batch
 
 def test_adc_to_ph_bounds():
     assert adc_to_ph(-100) == 0.0  # abaixo do mínimo
@@ -20,4 +20,9 @@ def test_adc_to_ph_accuracy():
     ]
     for adc, ph_real in samples:
         ph_calc = adc_to_ph(adc)
-        assert abs(ph_calc - ph_real) <= 0.2 
\ No newline at end of file
+        assert abs(ph_calc - ph_real) <= 0.2
+
+def test_adc_to_ph_batch_matches_scalar():
+    raws = [-100, 0, 1023, 2047, 3071, 4095, 5000]
+    esperado = [adc_to_ph(r) for r in raws]
+    assert adc_to_ph_batch(raws).tolist() == pytest.approx(esperado) 
\ No newline at end of file
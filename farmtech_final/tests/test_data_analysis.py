@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+from backend import data_analysis
+from backend.config_manager import LogicaCfg
+from backend.data_analysis import (descriptive_stats, detect_anomalies, simular_logica_irrigacao,
+                                   simular_logica_irrigacao_grade)
+
+
+def _detect_anomalies_pandas(df, col, z_thresh=3.0):
+    """Versão original em pandas, usada como referência."""
+    if df.empty: return df.assign(anomalia=False)
+    z_scores = (df[col] - df[col].mean()) / df[col].std(ddof=0)
+    return df.assign(anomalia=np.abs(z_scores) > z_thresh)
+
+
+@pytest.mark.parametrize("valores", [
+    np.r_[np.random.default_rng(0).normal(30, 5, 200), 90.0, -40.0],  # com outliers
+    [10.0, np.nan, 12.0, 11.0, np.nan, 80.0],                         # NaN no meio
+    [np.nan, np.nan, np.nan],                                         # só NaN
+    [25.0, 25.0, 25.0],                                               # desvio zero
+    [42.0],                                                           # uma leitura
+    [],                                                               # vazio
+])
+def test_detect_anomalies_igual_ao_pandas(valores):
+    df = pd.DataFrame({"umidade": pd.Series(valores, dtype="float64")})
+    pd.testing.assert_frame_equal(detect_anomalies(df, "umidade", 2.0),
+                                  _detect_anomalies_pandas(df, "umidade", 2.0))
+
+
+
+@pytest.mark.parametrize("dados", [
+    {"umidade": [30.0, np.nan, 35.5, 28.0, 41.2], "ph": [6.1, 6.4, np.nan, 5.9, 7.2]},
+    {"umidade": [30.0, 31.0, 29.0], "vazio": [np.nan, np.nan, np.nan]},  # coluna só com NaN
+    {"umidade": [30.0], "ph": [6.0]},                                    # uma linha (std NaN)
+    {"umidade": pd.Series([], dtype="float64")},                         # sem linhas
+    {"contagem": [1, 2, 3, 4], "decisao": ["a", "b", "a", "c"]},          # int + texto
+])
+def test_descriptive_stats_igual_ao_describe(dados):
+    df = pd.DataFrame(dados)
+    pd.testing.assert_frame_equal(descriptive_stats(df), df.describe().T, check_dtype=False)
+
+
+def _codigo_escalar(resultado):
+    """Código de MOTIVOS_LOGICA correspondente à saída de simular_logica_irrigacao."""
+    justificativa = resultado['justificativa']
+    if resultado['emergencia']:
+        return 1 if justificativa.startswith("EMERGÊNCIA: Umidade") else 2
+    if resultado['decisao'] == "Ligar bomba":
+        return 4
+    if "fora do ideal" in justificativa:
+        return 3
+    if "acima do necessário" in justificativa:
+        return 5
+    return 0
+
+
+@pytest.fixture(params=["numpy", "numba"])
+def kernel_grade(request, monkeypatch):
+    """Roda a grade com o kernel NumPy e, se instalado, com o kernel numba."""
+    if request.param == "numba":
+        pytest.importorskip("numba")
+        assert data_analysis._codigos_logica is not data_analysis._codigos_logica_numpy
+    else:
+        monkeypatch.setattr(data_analysis, "_codigos_logica", data_analysis._codigos_logica_numpy)
+    return request.param
+
+
+def test_grade_igual_a_logica_escalar(kernel_grade):
+    cfg = LogicaCfg()
+    # Grade regular + os próprios limiares, para fixar a igualdade nas fronteiras
+    umidade = np.unique(np.r_[np.linspace(0, 100, 201), cfg.UMIDADE_CRITICA_BAIXA,
+                              cfg.UMIDADE_MINIMA_PARA_IRRIGAR, cfg.UMIDADE_ALTA_PARAR_IRRIGACAO])
+    ph = np.unique(np.r_[np.linspace(3, 9, 121), cfg.PH_CRITICO_MINIMO, cfg.PH_IDEAL_MINIMO,
+                         cfg.PH_IDEAL_MAXIMO, cfg.PH_CRITICO_MAXIMO])
+    grade_u, grade_ph = np.meshgrid(umidade, ph)
+
+    codigos = simular_logica_irrigacao_grade(grade_u, grade_ph, cfg)
+
+    assert codigos.shape == grade_u.shape
+    escalares = [simular_logica_irrigacao(float(u), float(p), cfg)
+                 for u, p in zip(grade_u.ravel(), grade_ph.ravel())]
+    assert codigos.ravel().tolist() == [_codigo_escalar(r) for r in escalares]
+    assert data_analysis.BOMBA_POR_CODIGO[codigos.ravel()].tolist() == [
+        r['decisao'].startswith("Ligar bomba") for r in escalares]
\ No newline at end of file
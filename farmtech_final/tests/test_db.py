@@ -1,6 +1,9 @@
+import datetime
 import pytest
-from backend.db_manager import init_db, add_leitura, get_ultimas_leituras, LeituraSensor
+from backend.db_manager import init_db, add_leitura, add_leituras_bulk, get_ultimas_leituras, LeituraSensor
+from sqlalchemy import inspect, text
 from sqlalchemy.orm import sessionmaker
+from backend import db_manager
 
 def test_insert_and_fetch(tmp_path):
     """Testa a inicialização, inserção e busca no banco de dados."""
@@ -37,4 +40,44 @@ def test_insert_and_fetch(tmp_path):
     assert len(leituras) == 1
     assert leituras[0].ph_estimado == 6.8
 
-    db_session.close() 
\ No newline at end of file
+    db_session.close()
+
+
+def test_bulk_insert(tmp_path):
+    """Testa a inserção em lote numa única transação."""
+    engine = init_db(f"sqlite:///{tmp_path / 'bulk.db'}")
+    inicio = datetime.datetime(2024, 1, 1)
+    rows = [
+        dict(
+            timestamp=inicio + datetime.timedelta(minutes=5 * i),
+            umidade=30.0 + i,
+            ph_estimado=6.0,
+            fosforo_presente=True,
+            potassio_presente=False,
+            bomba_ligada=False,
+            emergencia=False,
+        )
+        for i in range(10)
+    ]
+
+    assert add_leituras_bulk(rows) == 10
+    assert add_leituras_bulk([]) == 0
+
+    db_session = sessionmaker(bind=engine)()
+    leituras = get_ultimas_leituras(db_session, 3)
+    assert [l.umidade for l in leituras] == [39.0, 38.0, 37.0]
+    db_session.close() 
+
+
+def test_init_db_cria_indice_em_banco_existente(tmp_path):
+    """Bancos criados antes do índice descendente o recebem no próximo init_db."""
+    db_url = f"sqlite:///{tmp_path / 'antigo.db'}"
+    engine = init_db(db_url)
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_leituras_ts_desc"))
+    engine.dispose()
+    db_manager._ENGINE = None  # força um novo init_db sobre a tabela já existente
+
+    engine = init_db(db_url)
+    indices = {ix["name"] for ix in inspect(engine).get_indexes(LeituraSensor.__tablename__)}
+    assert "ix_leituras_ts_desc" in indices
\ No newline at end of file
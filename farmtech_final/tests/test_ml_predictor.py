@@ -0,0 +1,18 @@
+import numpy as np
+import pandas as pd
+import pytest
+from backend.ml_predictor import _rolling_mean
+
+
+@pytest.mark.parametrize("valores, janela", [
+    (np.random.default_rng(0).normal(30, 5, 100), 3),
+    ([1.0, np.nan, 3.0, np.nan, np.nan, np.nan, 7.0, 8.0], 3),  # janelas só com NaN no meio
+    ([1.0, 2.0, np.nan, 4.0], 10),                             # janela maior que a série
+    ([np.nan, np.nan, np.nan], 2),                             # série só com NaN
+    ([5.0, 6.0, 7.0], 1),
+    ([], 3),
+])
+def test_rolling_mean_igual_ao_pandas(valores, janela):
+    a = np.asarray(valores, dtype=np.float64)
+    esperado = pd.Series(a).rolling(window=janela, min_periods=1).mean().to_numpy()
+    np.testing.assert_allclose(_rolling_mean(a, janela), esperado, rtol=1e-12, equal_nan=True)
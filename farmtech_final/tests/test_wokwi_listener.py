@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from backend import db_manager
+from backend.wokwi_listener import WokwiListener
+
+
+@pytest.fixture
+def listener(tmp_path, monkeypatch):
+    # Banco temporário: o listener inicializa o banco no construtor
+    monkeypatch.setattr(db_manager, "DATABASE_URL", f"sqlite:///{tmp_path / 'wokwi.db'}")
+    return WokwiListener()
+
+
+def test_decidir_lote_igual_a_logica_escalar(listener):
+    """Bomba e motivo do lote batem, linha a linha, com _simulate_irrigation_logic."""
+    rng = np.random.default_rng(42)
+    th = listener._th
+    # Leituras sorteadas cobrindo todas as faixas + a grade dos próprios limiares
+    limites_u = [th.UMIDADE_CRITICA_BAIXA, th.UMIDADE_MINIMA_PARA_IRRIGAR, th.UMIDADE_ALTA_PARAR_IRRIGACAO]
+    limites_ph = [th.PH_CRITICO_MINIMO, th.PH_IDEAL_MINIMO, th.PH_IDEAL_MAXIMO, th.PH_CRITICO_MAXIMO]
+    grade_u, grade_ph = np.meshgrid(limites_u, limites_ph)
+    umidade = np.concatenate([rng.uniform(0, 100, 2000), grade_u.ravel()])
+    ph = np.concatenate([rng.uniform(3, 9, 2000), grade_ph.ravel()])
+    fosforo = rng.random(umidade.size) > 0.3
+    potassio = rng.random(umidade.size) > 0.3
+
+    bomba, motivo, emergencia = listener._decidir_lote(umidade, ph, fosforo, potassio)
+
+    for i in range(umidade.size):
+        esperado = listener._simulate_irrigation_logic(
+            float(umidade[i]), float(ph[i]), bool(fosforo[i]), bool(potassio[i]), 25.0)
+        assert (bool(bomba[i]), motivo[i]) == esperado
+    assert np.array_equal(emergencia, (umidade < th.UMIDADE_CRITICA_BAIXA)
+                          | (ph < th.PH_CRITICO_MINIMO) | (ph > th.PH_CRITICO_MAXIMO))
+
+
+def test_simulate_batch_formato(listener):
+    df = listener.simulate_batch(50)
+    assert len(df) == 50
+    assert df["timestamp"].is_monotonic_increasing
+    assert df["umidade"].between(0, 100).all()
+    assert df["ph_estimado"].between(0, 14).all()